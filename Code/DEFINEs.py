@@ -1,8 +1,13 @@
 DATASET_FILE_PATH = "D:/Innovation/Dataset/AUDCAD_Dataset.csv"
+JOURNAL_FILE_PATH = "../Log/trade_journal.bin"
+EQUITY_FILE_PATH = "../Log/equity.npz"
+EQUITY_CAPACITY = 1_000_000  # most recent ticks kept by the equity recorder
 INITIAL_BALANCE = 1000
 RISK_PERCENTAGE = 0.10
 SPREAD = 2
 COMMISSION_PER_LOT = 7
 LEVERAGE = 10
-
-
+API_HOST = "127.0.0.1"
+API_PORT = 5000
+API_STREAM_PORT = 5001  # /stream on the main port redirects here
+API_THREADS = 32
@@ -46,6 +46,13 @@ class SimpleTrader:
         self.last_action = action
         return action
 
+    def load_q_table(self, path):
+        """بارگذاری جدول Q ذخیره‌شده با np.save (مثلاً خروجی q_trainer.py)"""
+        q_table = np.load(path)
+        if q_table.shape != self.q_table.shape:
+            raise ValueError(f"Expected a Q-table of shape {self.q_table.shape}, got {q_table.shape}")
+        self.q_table = q_table
+
     def update_q_table(self, reward, new_rsi):
         """به‌روزرسانی جدول Q بر اساس پاداش"""
         if self.last_state is None or self.last_action is None:
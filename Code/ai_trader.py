@@ -1,15 +1,118 @@
+import argparse
+import asyncio
+import json
+import os
+import threading
 import requests
 import time
 import numpy as np
 from enum import Enum
+from requests.adapters import HTTPAdapter
+from checkpoint import Checkpointer, load_checkpoint
+from tick_stream import TickStream
 
 class Action(Enum):
     BUY = 0
     SELL = 1
     HOLD = 2
 
+def make_session(pool_size=10):
+    """Keep-alive HTTP session with a connection pool; traders in one process can share it."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+class SSEParser:
+    """Feeds Server-Sent Events lines and returns the JSON payload of each complete event."""
+
+    def __init__(self):
+        self.data = []
+
+    def feed(self, line):
+        if line == "":
+            if not self.data:
+                return None
+            payload = json.loads("\n".join(self.data))
+            self.data = []
+            return payload
+        field, _, value = line.partition(":")
+        if field == "data":
+            self.data.append(value[1:] if value.startswith(" ") else value)
+        return None
+
+class HttpTransport:
+    """Talks to the simulator API over HTTP; for traders running in another process or on another machine."""
+
+    def __init__(self, api_url="http://127.0.0.1:5000", session=None):
+        self.api_url = api_url
+        self.session = session or make_session()
+
+    def current_data(self):
+        response = self.session.get(f"{self.api_url}/current_data")
+        return response.json() if response.status_code == 200 else None
+
+    def open_trade(self, trade_type, is_ai_trade=True):
+        response = self.session.post(f"{self.api_url}/open_trade", json={"trade_type": trade_type, "is_ai_trade": is_ai_trade})
+        return response.json()["trade_id"] if response.status_code == 200 else None
+
+    def close_trade(self, trade_id):
+        response = self.session.post(f"{self.api_url}/close_trade", json={"trade_id": trade_id})
+        return response.json()["profit"] if response.status_code == 200 else None
+
+    def ticks(self, since=None):
+        """Ticks pushed by /stream, resuming after sequence number `since`."""
+        url = f"{self.api_url}/stream" if since is None else f"{self.api_url}/stream?since={since}"
+        parser = SSEParser()
+        with self.session.get(url, stream=True, timeout=(5, 60)) as response:
+            for line in response.iter_lines(decode_unicode=True):
+                tick = parser.feed(line)
+                if tick is not None:
+                    yield tick
+
+class LocalTransport:
+    """Calls the Simulator directly when the trader lives in the same process: no JSON, no sockets.
+
+    With drive_clock=True the trader owns time, as in an offline training run: every
+    current_data() call first advances the cursor one sub-tick and updates the open trades.
+    """
+
+    def __init__(self, simulator, drive_clock=False):
+        self.simulator = simulator
+        self.drive_clock = drive_clock
+        self.tick_stream = None
+
+    def current_data(self):
+        data_manager = self.simulator.data_manager
+        if self.drive_clock:
+            data_manager.step_forward()
+            self.simulator.update_trades()
+        price = data_manager.get_current_price()
+        if price is None:
+            return None
+        return {"rsi": float(data_manager.get_value('rsi14', 50)), "price": float(price), "index": data_manager.current_index}
+
+    def open_trade(self, trade_type, is_ai_trade=True):
+        return self.simulator.open_trade(trade_type, is_ai_trade=is_ai_trade)
+
+    def close_trade(self, trade_id):
+        return self.simulator.close_trade(trade_id)
+
+    def ticks(self, since=None):
+        if self.tick_stream is None:
+            self.tick_stream = TickStream(self.simulator)
+        sequence = self.tick_stream.sequence if since is None else since
+        while True:
+            batch = self.tick_stream.wait(sequence, timeout=15)
+            for tick in batch:
+                yield tick
+            if batch:
+                sequence = batch[-1]["seq"]
+
 class SimpleTrader:
-    def __init__(self, api_url="http://127.0.0.1:5000", rsi_threshold_low=30, rsi_threshold_high=70, learning_rate=0.1, discount_factor=0.9, epsilon=0.1, leverage=1):
+    def __init__(self, api_url="http://127.0.0.1:5000", rsi_threshold_low=30, rsi_threshold_high=70, learning_rate=0.1, discount_factor=0.9, epsilon=0.1, leverage=1,
+                 session=None, interval=1.0, event_driven=False, verbose=True, transport=None, features=None):
         self.api_url = api_url
         self.rsi_threshold_low = rsi_threshold_low
         self.rsi_threshold_high = rsi_threshold_high
@@ -17,12 +120,22 @@ class SimpleTrader:
         self.discount_factor = discount_factor
         self.epsilon = epsilon
         self.leverage = leverage  # اهرم برای AI
-        self.q_table = np.zeros((3, len(Action)))
+        self.features = features  # optional features.FeatureSet of the replayed dataset: one state per bar
+        self.q_table = np.zeros((features.n_states if features is not None else 3, len(Action)))
         self.last_action = None
         self.last_state = None
         self.open_trade_id = None
+        self.session = session
+        self.transport = transport  # HttpTransport(api_url, session) unless given, e.g. a LocalTransport
+        self.interval = interval  # seconds between /current_data polls (0 = as fast as the API answers)
+        self.event_driven = event_driven  # act on every tick pushed by /stream instead of polling
+        self.verbose = verbose
+        self.last_seq = None
+        self.decisions = 0
 
-    def get_state(self, rsi):
+    def get_state(self, rsi, index=None):
+        if self.features is not None and index is not None:
+            return self.features.state(index)
         if rsi < self.rsi_threshold_low:
             return 0
         elif rsi > self.rsi_threshold_high:
@@ -30,8 +143,8 @@ class SimpleTrader:
         else:
             return 1
 
-    def decide_action(self, rsi):
-        current_state = self.get_state(rsi)
+    def decide_action(self, rsi, index=None):
+        current_state = self.get_state(rsi, index)
         if np.random.random() < self.epsilon:
             action = np.random.choice(list(Action))
         else:
@@ -40,10 +153,17 @@ class SimpleTrader:
         self.last_action = action
         return action
 
-    def update_q_table(self, reward, new_rsi):
+    def load_q_table(self, path):
+        """Start from a Q-table saved with np.save, e.g. by q_trainer.py."""
+        q_table = np.load(path)
+        if q_table.shape != self.q_table.shape:
+            raise ValueError(f"Expected a Q-table of shape {self.q_table.shape}, got {q_table.shape}")
+        self.q_table = q_table
+
+    def update_q_table(self, reward, new_rsi, new_index=None):
         if self.last_state is None or self.last_action is None:
             return
-        new_state = self.get_state(new_rsi)
+        new_state = self.get_state(new_rsi, new_index)
         old_value = self.q_table[self.last_state, self.last_action.value]
         future_reward = np.max(self.q_table[new_state])
         new_value = old_value + self.learning_rate * (reward + self.discount_factor * future_reward - old_value)
@@ -56,57 +176,211 @@ class SimpleTrader:
             return -1.0
         return 0.0
 
+    def order_for(self, action):
+        """The order an action leads to: ("open", trade_type), ("close", trade_id) or None."""
+        if action == Action.BUY and not self.open_trade_id:
+            return ("open", "buy")
+        elif action == Action.SELL and not self.open_trade_id:
+            return ("open", "sell")
+        elif action == Action.HOLD and self.open_trade_id:
+            return ("close", self.open_trade_id)
+        return None
+
+    def log(self, message):
+        if self.verbose:
+            print(message)
+
+    def running(self, stop, steps):
+        return (stop is None or not stop.is_set()) and (steps is None or self.decisions < steps)
+
     def open_trade(self, trade_type):
         # ارسال اهرم به API (در این نسخه فرض می‌کنیم اهرم توی Simulator تنظیم شده)
-        response = requests.post(f"{self.api_url}/open_trade", json={"trade_type": trade_type, "is_ai_trade": True})
-        if response.status_code == 200:
-            trade_id = response.json()["trade_id"]
-            print(f"Opened {trade_type} trade with ID {trade_id} and leverage {self.leverage}")
-            return trade_id
-        return None
+        trade_id = self.transport.open_trade(trade_type)
+        if trade_id:
+            self.log(f"Opened {trade_type} trade with ID {trade_id} and leverage {self.leverage}")
+        return trade_id
 
     def close_trade(self, trade_id):
-        response = requests.post(f"{self.api_url}/close_trade", json={"trade_id": trade_id})
-        if response.status_code == 200:
-            profit = response.json()["profit"]
-            print(f"Closed trade {trade_id} with profit: {profit}")
-            return profit
-        return None
+        profit = self.transport.close_trade(trade_id)
+        if profit is not None:
+            self.log(f"Closed trade {trade_id} with profit: {profit}")
+        return profit
 
-    def run(self):
-        print("AI Trader started. Press Ctrl+C to stop.")
-        while True:
+    def act(self, rsi, index=None):
+        """Decide on the latest RSI (or bar state), send the resulting order and learn from it."""
+        order = self.order_for(self.decide_action(rsi, index))
+        profit = 0
+        if order and order[0] == "open":
+            self.open_trade_id = self.open_trade(order[1])
+        elif order:
+            profit = self.close_trade(order[1]) or 0
+            self.open_trade_id = None
+        self.update_q_table(self.get_reward(profit), rsi, index)
+        self.decisions += 1
+
+    def poll(self):
+        return self.transport.current_data() or {"rsi": 50}
+
+    def follow_stream(self, stop=None, steps=None):
+        # One decision per pushed tick; reconnects resume after the last tick seen
+        for tick in self.transport.ticks(self.last_seq):
+            if not self.running(stop, steps):
+                return
+            self.last_seq = tick["seq"]
+            self.act(tick["rsi"], tick["index"])
+
+    def run(self, stop=None, steps=None):
+        """Trade until Ctrl+C, the `stop` event is set or `steps` decisions have been made."""
+        if self.transport is None:
+            self.transport = HttpTransport(self.api_url, self.session)
+        self.log("AI Trader started. Press Ctrl+C to stop.")
+        while self.running(stop, steps):
             try:
-                response = requests.get(f"{self.api_url}/current_data")
-                if response.status_code == 200:
-                    data = response.json()
-                    rsi = data["rsi"]
-                    current_price = data["price"]
-                else:
-                    rsi = 50
-                    current_price = None
-
-                action = self.decide_action(rsi)
-                profit = 0
-
-                if action == Action.BUY and not self.open_trade_id:
-                    self.open_trade_id = self.open_trade("buy")
-                elif action == Action.SELL and not self.open_trade_id:
-                    self.open_trade_id = self.open_trade("sell")
-                elif action == Action.HOLD and self.open_trade_id:
-                    profit = self.close_trade(self.open_trade_id)
-                    self.open_trade_id = None
-
-                reward = self.get_reward(profit)
-                self.update_q_table(reward, rsi)
-                time.sleep(1)
+                if self.event_driven:
+                    self.follow_stream(stop, steps)
+                    continue
+                data = self.poll()
+                self.act(data["rsi"], data.get("index"))
+                if self.interval:
+                    time.sleep(self.interval)
             except KeyboardInterrupt:
-                print("AI Trader stopped.")
+                self.log("AI Trader stopped.")
                 break
             except Exception as e:
                 print(f"Error: {e}")
                 time.sleep(1)
 
+class AsyncSimpleTrader(SimpleTrader):
+    """SimpleTrader on asyncio: many traders run as tasks of one event loop over one aiohttp connection pool."""
+
+    async def open_trade(self, trade_type):
+        async with self.session.post(f"{self.api_url}/open_trade", json={"trade_type": trade_type, "is_ai_trade": True}) as response:
+            if response.status == 200:
+                trade_id = (await response.json())["trade_id"]
+                self.log(f"Opened {trade_type} trade with ID {trade_id} and leverage {self.leverage}")
+                return trade_id
+        return None
+
+    async def close_trade(self, trade_id):
+        async with self.session.post(f"{self.api_url}/close_trade", json={"trade_id": trade_id}) as response:
+            if response.status == 200:
+                profit = (await response.json())["profit"]
+                self.log(f"Closed trade {trade_id} with profit: {profit}")
+                return profit
+        return None
+
+    async def act(self, rsi, index=None):
+        order = self.order_for(self.decide_action(rsi, index))
+        profit = 0
+        if order and order[0] == "open":
+            self.open_trade_id = await self.open_trade(order[1])
+        elif order:
+            profit = await self.close_trade(order[1]) or 0
+            self.open_trade_id = None
+        self.update_q_table(self.get_reward(profit), rsi, index)
+        self.decisions += 1
+
+    def stream_url(self):
+        url = f"{self.api_url}/stream"
+        return url if self.last_seq is None else f"{url}?since={self.last_seq}"
+
+    async def poll(self):
+        async with self.session.get(f"{self.api_url}/current_data") as response:
+            if response.status == 200:
+                return await response.json()
+        return {"rsi": 50}
+
+    async def follow_stream(self, stop=None, steps=None):
+        parser = SSEParser()
+        async with self.session.get(self.stream_url()) as response:
+            async for line in response.content:
+                if not self.running(stop, steps):
+                    return
+                tick = parser.feed(line.decode().rstrip("\r\n"))
+                if tick is not None:
+                    self.last_seq = tick["seq"]
+                    await self.act(tick["rsi"], tick["index"])
+
+    async def run(self, stop=None, steps=None):
+        while self.running(stop, steps):
+            try:
+                if self.event_driven:
+                    await self.follow_stream(stop, steps)
+                    continue
+                data = await self.poll()
+                await self.act(data["rsi"], data.get("index"))
+                await asyncio.sleep(self.interval)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Error: {e}")
+                await asyncio.sleep(1)
+
+async def run_async_traders(traders, stop=None, pool_size=100):
+    """Run AsyncSimpleTraders concurrently on a shared aiohttp session (needs the optional aiohttp package)."""
+    import aiohttp
+    connector = aiohttp.TCPConnector(limit=pool_size)
+    timeout = aiohttp.ClientTimeout(total=None, sock_connect=5, sock_read=60)
+    async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+        for trader in traders:
+            trader.session = session
+        await asyncio.gather(*(trader.run(stop) for trader in traders))
+
+def run_traders(count, use_async=False, q_table=None, **kwargs):
+    """Run `count` traders in this process: threads sharing one pooled session, or asyncio tasks."""
+    if use_async:
+        traders = [AsyncSimpleTrader(**kwargs) for _ in range(count)]
+        if q_table:
+            for trader in traders:
+                trader.load_q_table(q_table)
+        try:
+            asyncio.run(run_async_traders(traders, pool_size=max(count, 10)))
+        except KeyboardInterrupt:
+            print("AI Traders stopped.")
+        return traders
+    session = make_session(pool_size=max(count, 10))
+    traders = [SimpleTrader(session=session, **kwargs) for _ in range(count)]
+    if q_table:
+        for trader in traders:
+            trader.load_q_table(q_table)
+    stop = threading.Event()
+    threads = [threading.Thread(target=trader.run, args=(stop,), daemon=True) for trader in traders]
+    for thread in threads:
+        thread.start()
+    try:
+        while any(thread.is_alive() for thread in threads):
+            time.sleep(0.5)
+    except KeyboardInterrupt:
+        stop.set()
+        print("AI Traders stopped.")
+    return traders
+
+def main():
+    parser = argparse.ArgumentParser(description="RSI Q-learning trader(s) against the simulator API")
+    parser.add_argument("--api-url", default="http://127.0.0.1:5000")
+    parser.add_argument("--traders", type=int, default=1)
+    parser.add_argument("--interval", type=float, default=1.0, help="seconds between polls (0 = as fast as possible)")
+    parser.add_argument("--stream", action="store_true", help="act on every pushed tick instead of polling")
+    parser.add_argument("--async", dest="use_async", action="store_true", help="run the traders on asyncio (needs aiohttp)")
+    parser.add_argument("--leverage", type=float, default=10)  # اهرم پیش‌فرض 10 برای AI
+    parser.add_argument("--q-table", default=None, help="start from a Q-table saved by q_trainer.py")
+    parser.add_argument("--checkpoint", default=None, help="resume the learned Q-table from this file and save it periodically")
+    parser.add_argument("--checkpoint-every", type=float, default=60)
+    args = parser.parse_args()
+    kwargs = dict(api_url=args.api_url, leverage=args.leverage, interval=args.interval, event_driven=args.stream)
+    if args.traders == 1 and not args.use_async:
+        trader = SimpleTrader(**kwargs)
+        if args.q_table:
+            trader.load_q_table(args.q_table)
+        if args.checkpoint is None:
+            trader.run()
+            return
+        if os.path.exists(args.checkpoint):
+            load_checkpoint(args.checkpoint, agents={'trader': trader})
+        with Checkpointer(args.checkpoint, args.checkpoint_every, agents={'trader': trader}):
+            trader.run()
+    else:
+        run_traders(args.traders, args.use_async, verbose=False, q_table=args.q_table, **kwargs)
+
 if __name__ == "__main__":
-    trader = SimpleTrader(leverage=10)  # اهرم پیش‌فرض 10 برای AI
-    trader.run()
\ No newline at end of file
+    main()
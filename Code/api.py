@@ -1,20 +1,86 @@
-from flask import Flask, request, jsonify
+import json
+import math
+from flask import Flask, Response, redirect, request, jsonify
+import threading
+from urllib.parse import urlsplit
+from werkzeug.serving import make_server
+from tick_stream import TickStream
+from features import DEFAULT_FEATURES
+from trading_env import ACTIONS, TradingEnv
 
-def create_api(simulator):
+def event_stream(ticks):
+    """Server-Sent Events response for /stream: one "tick" event per price update, id = sequence number.
+
+    Reconnecting clients send Last-Event-ID (or ?since=) to resume without gaps. The response never
+    ends, so it holds its server thread for as long as the client stays connected.
+    """
+    last_id = request.headers.get("Last-Event-ID", request.args.get("since"))
+    try:
+        sequence = int(last_id)
+    except (TypeError, ValueError):
+        sequence = ticks.sequence
+
+    def events():
+        nonlocal sequence
+        yield ": connected\n\n"  # servers send the headers with the first chunk; don't make the client wait
+        while True:
+            batch = ticks.wait(sequence, timeout=15)
+            if not batch:
+                yield ": keep-alive\n\n"
+                continue
+            for tick in batch:
+                yield f"id: {tick['seq']}\nevent: tick\ndata: {json.dumps(tick)}\n\n"
+            sequence = batch[-1]["seq"]
+
+    return Response(events(), mimetype="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+
+def start_stream_server(tick_stream, host, port):
+    """Serve /stream from a thread-per-connection server in a background thread.
+
+    A pooled server such as waitress would tie up one of its fixed worker threads per stream
+    client for good, so a handful of clients could starve every other endpoint.
+    """
+    app = Flask(__name__)
+    app.add_url_rule('/stream', 'stream', lambda: event_stream(tick_stream))
+    server = make_server(host, port, app, threaded=True)
+    threading.Thread(target=server.serve_forever, name="stream-server", daemon=True).start()
+    return server
+
+
+def reply(payload, status=200):
+    # json.dumps straight into a Response: the order and price endpoints are hit thousands of times a
+    # second and jsonify's app-context lookups and pretty-print checks cost more than the handler itself
+    return Response(json.dumps(payload, default=float), status=status, mimetype='application/json')
+
+
+def create_api(simulator, tick_stream=None, stream_port=None, max_streams=None):
+    """The trading API. With `stream_port`, /stream redirects to that port on the same host (see
+    start_stream_server); otherwise it is served in place, refusing clients beyond `max_streams` with a 503."""
     app = Flask(__name__)
+    app.tick_stream = tick_stream or TickStream(simulator)
+    stream_slots = threading.BoundedSemaphore(max_streams) if max_streams else None
+    app.envs = {}
+    envs_lock = threading.Lock()
+
+    def known_symbol(symbol):
+        return symbol is None or symbol in getattr(simulator.data_manager, 'symbols', ())
 
     @app.route('/open_trade', methods=['POST'])
     def open_trade():
         data = request.json
         trade_type = data.get("trade_type")
         is_ai_trade = data.get("is_ai_trade", False)
+        symbol = data.get("symbol")
         if trade_type not in ["buy", "sell"]:
-            return jsonify({"error": "Invalid trade type"}), 400
-        trade_id = simulator.open_trade(trade_type, is_ai_trade=is_ai_trade)
+            return reply({"error": "Invalid trade type"}, 400)
+        if not known_symbol(symbol):
+            return reply({"error": "Unknown symbol"}, 400)
+        trade_id = simulator.open_trade(trade_type, is_ai_trade=is_ai_trade, symbol=symbol)
         if trade_id:
-            return jsonify({"trade_id": trade_id}), 200
+            return reply({"trade_id": trade_id})
         else:
-            return jsonify({"error": "Unable to open trade"}), 400
+            return reply({"error": "Unable to open trade"}, 400)
 
     @app.route('/close_trade', methods=['POST'])
     def close_trade():
@@ -23,18 +89,107 @@ def create_api(simulator):
         try:
             trade_id = int(trade_id)
         except:
-            return jsonify({"error": "Invalid trade ID"}), 400
+            return reply({"error": "Invalid trade ID"}, 400)
         profit = simulator.close_trade(trade_id)
         if profit is not None:
-            return jsonify({"profit": profit}), 200
+            return reply({"profit": profit})
         else:
-            return jsonify({"error": "Trade not found or already closed"}), 400
+            return reply({"error": "Trade not found or already closed"}, 400)
+
+    @app.route('/batch_orders', methods=['POST'])
+    def batch_orders():
+        # All orders are validated first; if any is invalid nothing is applied
+        orders = (request.json or {}).get("orders")
+        if not isinstance(orders, list):
+            return reply({"error": "Expected a list of orders"}, 400)
+        errors = [simulator.validate_order(order) for order in orders]
+        for i, order in enumerate(orders):
+            if errors[i] is None and not known_symbol(order.get("symbol")):
+                errors[i] = "Unknown symbol"
+        if any(errors):
+            return reply({"error": "Invalid orders", "results": [{"ok": e is None, "error": e} for e in errors]}, 400)
+        return reply({"results": simulator.execute_orders(orders)})
+
+    @app.route('/close_all', methods=['POST'])
+    def close_all():
+        data = request.json or {}
+        order = {"action": "close_all", "trade_type": data.get("trade_type"),
+                 "is_ai_trade": data.get("is_ai_trade"), "symbol": data.get("symbol")}
+        if simulator.validate_order(order) is not None or not known_symbol(order["symbol"]):
+            return reply({"error": "Invalid filter"}, 400)
+        return reply({"profits": simulator.execute_orders([order])[0]["profits"]})
+
+    @app.route('/env/reset', methods=['POST'])
+    def env_reset():
+        # Lockstep environment for agent training; each env_id gets its own cursor and simulator
+        data = request.json or {}
+        env_id = str(data.get("env_id", "default"))
+        try:
+            env = TradingEnv(simulator.data_manager, episode_length=data.get("episode_length"),
+                             stop_loss_pips=data.get("stop_loss_pips", 20),
+                             features=DEFAULT_FEATURES if data.get("features") else None)
+            observation = env.reset(seed=data.get("seed"), start_index=data.get("start_index"))
+        except (TypeError, ValueError, AttributeError) as e:
+            return jsonify({"error": f"Unable to reset environment: {e}"}), 400
+        with envs_lock:
+            app.envs[env_id] = env
+        return jsonify({"env_id": env_id, "observation": observation}), 200
+
+    @app.route('/env/step', methods=['POST'])
+    def env_step():
+        data = request.json or {}
+        env = app.envs.get(str(data.get("env_id", "default")))
+        if env is None:
+            return jsonify({"error": "Unknown environment, call /env/reset first"}), 400
+        action = data.get("action")
+        valid_index = isinstance(action, int) and not isinstance(action, bool) and 0 <= action < len(ACTIONS)
+        if not (valid_index or (isinstance(action, str) and action.lower() in ACTIONS)):
+            return jsonify({"error": "Invalid action"}), 400
+        try:
+            observation, reward, done, info = env.step(action)
+        except RuntimeError as e:
+            return jsonify({"error": str(e)}), 400
+        return jsonify({"observation": observation, "reward": reward, "done": done, "info": info}), 200
 
     @app.route('/current_data', methods=['GET'])
     def get_current_data():
-        current_data = simulator.data_manager.get_current_data()
-        if current_data is not None:
-            return jsonify({"rsi": current_data.get('rsi14', 50), "price": simulator.data_manager.get_current_price()}), 200
-        return jsonify({"error": "No current data available"}), 400
+        data_manager = simulator.data_manager
+        symbol = request.args.get("symbol")
+        if symbol is None:
+            current_price = data_manager.get_current_price()
+            rsi = data_manager.get_value('rsi14', 50)
+        elif known_symbol(symbol):
+            current_price = data_manager.get_current_price(symbol)
+            rsi = data_manager.get_value('rsi14', 50, symbol=symbol)
+        else:
+            return reply({"error": "Unknown symbol"}, 400)
+        if current_price is not None:
+            data = {"rsi": float(rsi), "price": float(current_price)}
+            if symbol is None:
+                data["index"] = data_manager.current_index
+            return reply(data)
+        return reply({"error": "No current data available"}, 400)
+
+    @app.route('/stats', methods=['GET'])
+    def get_stats():
+        # Running totals kept by the simulator, so this is O(1) however long the session; an
+        # undefined ratio (a profit factor with no losing trade) is sent as null
+        stats = {name: value if math.isfinite(value) else None for name, value in simulator.get_stats().items()}
+        return jsonify(stats), 200
+
+    @app.route('/stream', methods=['GET'])
+    def stream():
+        if stream_port:
+            host = urlsplit(request.host_url).hostname
+            host = f"[{host}]" if ":" in host else host
+            query = request.query_string.decode()
+            return redirect(f"{request.scheme}://{host}:{stream_port}/stream" + (f"?{query}" if query else ""), code=307)
+        if stream_slots is None:
+            return event_stream(app.tick_stream)
+        if not stream_slots.acquire(blocking=False):
+            return jsonify({"error": "Too many stream clients"}), 503, {"Retry-After": "5"}
+        response = event_stream(app.tick_stream)
+        response.call_on_close(stream_slots.release)
+        return response
 
     return app
\ No newline at end of file
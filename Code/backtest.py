@@ -0,0 +1,157 @@
+import argparse
+import time
+
+import numpy as np
+
+from DEFINEs import *
+from data_manager import DataManager, SUB_TICKS, require_single_symbol
+from equity import EquityRecorder
+from journal import TradeJournal, human_logging
+from simulator import Simulator, Trade
+
+
+class BacktestResult:
+    def __init__(self, trades, equity, times, report, metrics):
+        self.trades = trades  # closed Trade objects in the order they were opened
+        self.equity = equity  # account equity at every sub-tick, shape (bars * 4,)
+        self.times = times  # bar timestamp of every sub-tick, shape (bars * 4,)
+        self.report = report
+        self.metrics = metrics
+
+
+def rsi_signals(data_manager, rsi_threshold_low=30, rsi_threshold_high=70, column='rsi14'):
+    """The SimpleTrader rule as a target position: long when oversold, short when overbought, flat otherwise."""
+    rsi = data_manager.store.columns[column]
+    signals = np.zeros(len(rsi), dtype=np.int8)
+    signals[rsi < rsi_threshold_low] = 1
+    signals[rsi > rsi_threshold_high] = -1
+    return signals
+
+
+def run_backtest(data_manager, strategy=None, signals=None, stop_loss_pips=20, initial_balance=INITIAL_BALANCE,
+                 risk_percentage=RISK_PERCENTAGE, spread=SPREAD, commission_per_lot=COMMISSION_PER_LOT, leverage=LEVERAGE,
+                 journal=None, recorder=None):
+    """Replay the whole dataset without the GUI.
+
+    `signals` (or the array returned by `strategy(data_manager)`) holds one target position per bar:
+    1 for long, -1 for short and 0 for flat. The signal of bar i is known once that bar has closed, so it
+    is executed at the Open of bar i + 1. A position is held until the target changes or its stop loss is
+    hit on the Open/High-or-Low/Low-or-High/Close sub-tick path; after a stop-out the next entry waits
+    for the next change of target. Trades go to `journal` (a journal.TradeJournal) and the per-tick
+    account state to `recorder` (an equity.EquityRecorder) if they are given.
+    """
+    require_single_symbol(data_manager, "run_backtest")
+    if signals is None:
+        if strategy is None:
+            raise ValueError("Either a strategy or a signal array is required")
+        signals = strategy(data_manager)
+    store = data_manager.store
+    bars = len(store)
+    signals = np.asarray(signals)
+    if len(signals) != bars:
+        raise ValueError(f"Expected {bars} signals, got {len(signals)}")
+
+    simulator = Simulator(data_manager, initial_balance, risk_percentage, spread, commission_per_lot, leverage, journal)
+    path = store.path.ravel()
+    ticks = len(path)
+
+    target = np.zeros(bars, dtype=np.int8)
+    target[1:] = np.sign(signals[:-1])
+    change_bars = np.flatnonzero(np.diff(target, prepend=0))
+    change_ticks = np.append(change_bars * SUB_TICKS, ticks - 1)
+    stop_distance = stop_loss_pips * 0.0001
+
+    realized = np.zeros(ticks)
+    unrealized = np.zeros(ticks)
+    exposed = np.zeros(ticks, dtype=bool)
+    margin = np.zeros(ticks)
+    for k, bar in enumerate(change_bars):
+        side = target[bar]
+        if side == 0:
+            continue
+        entry_tick = bar * SUB_TICKS
+        exit_tick = change_ticks[k + 1]
+        entry_price = path[entry_tick]
+
+        trade_type = "buy" if side > 0 else "sell"
+        simulator.trade_counter += 1
+        size = simulator.calculate_position_size(stop_loss_pips)
+        trade = Trade(simulator.trade_counter, trade_type, entry_price, size, store.time(bar),
+                      spread, commission_per_lot, stop_loss_pips, leverage)
+
+        segment = path[entry_tick + 1:exit_tick]
+        if side > 0:
+            stop_price = entry_price - stop_distance
+            hits = np.flatnonzero(segment <= stop_price)
+        else:
+            stop_price = entry_price + stop_distance
+            hits = np.flatnonzero(segment >= stop_price)
+        if len(hits):
+            exit_tick = entry_tick + 1 + hits[0]
+            exit_price = stop_price
+        else:
+            exit_price = path[exit_tick]
+
+        held = path[entry_tick:exit_tick]
+        exposed[entry_tick:exit_tick] = True
+        margin[entry_tick:exit_tick] = size * 10000 * entry_price
+        unrealized[entry_tick:exit_tick] = side * (held - entry_price) - spread * 0.0001
+        unrealized[entry_tick:exit_tick] *= size * 10000 * leverage
+        unrealized[entry_tick:exit_tick] -= commission_per_lot * size
+
+        profit = trade.close(exit_price, store.time(exit_tick // SUB_TICKS))
+        simulator.book.add(trade)
+        simulator.account_balance += profit
+        simulator.stats.add_trade(profit)
+        if journal is not None:
+            journal.record('open', trade, entry_price)
+            journal.record('stop' if len(hits) else 'close', trade, exit_price, profit, simulator.account_balance)
+        realized[exit_tick] += profit
+
+    balance = initial_balance + np.cumsum(realized)
+    equity = balance + unrealized
+    times = np.repeat(store.date_time, SUB_TICKS)
+    simulator.stats.extend(times.view(np.int64), equity, exposed)
+    if recorder is not None:
+        recorder.extend(times.view(np.int64), balance, equity, margin, exposed)
+    summary = simulator.get_stats()
+    metrics = {"final_balance": float(simulator.account_balance)}
+    metrics.update({name: summary[name] for name in ("total_profit", "trades", "win_rate", "max_drawdown",
+                                                     "profit_factor", "sharpe", "sortino", "exposure")})
+    closed = simulator.get_closed_trades()
+    report = simulator.generate_report()
+    return BacktestResult(closed, equity, times, report, metrics)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless backtest of the RSI strategy over a dataset")
+    parser.add_argument("--csv", default=DATASET_FILE_PATH)
+    parser.add_argument("--rsi-low", type=float, default=30)
+    parser.add_argument("--rsi-high", type=float, default=70)
+    parser.add_argument("--stop-loss", type=float, default=20)
+    parser.add_argument("--journal", default=None, help="write every trade event to this binary journal (see journal.read_journal)")
+    parser.add_argument("--equity", default=None, help="save the per-tick equity curve to this .npz file (see equity.load_equity)")
+    parser.add_argument("--quiet", action="store_true", help="no per-trade messages in the human-readable log")
+    args = parser.parse_args()
+
+    if args.quiet:
+        human_logging(False)
+    journal = TradeJournal(args.journal) if args.journal else None
+    data_manager = DataManager(args.csv)
+    recorder = EquityRecorder(capacity=max(len(data_manager) * SUB_TICKS, 1)) if args.equity else None
+    start = time.perf_counter()
+    result = run_backtest(data_manager, signals=rsi_signals(data_manager, args.rsi_low, args.rsi_high),
+                          stop_loss_pips=args.stop_loss, journal=journal, recorder=recorder)
+    elapsed = time.perf_counter() - start
+    if journal is not None:
+        journal.close()
+        print(f"{journal.written} trade events written to {args.journal}")
+    if recorder is not None:
+        recorder.save(args.equity)
+        print(f"{len(recorder)} equity rows written to {args.equity}")
+    print(result.report)
+    print(f"Replayed {len(data_manager)} bars in {elapsed * 1000:.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
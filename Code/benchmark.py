@@ -0,0 +1,433 @@
+import argparse
+import os
+import tempfile
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from DEFINEs import *
+from data_manager import DataManager
+
+
+def _rate(func, count):
+    start = time.perf_counter()
+    func(count)
+    elapsed = time.perf_counter() - start
+    return count / elapsed if elapsed > 0 else float('inf')
+
+
+def make_synthetic_csv(path, rows, seed=0):
+    """Write a random-walk hourly dataset in the same layout as the broker exports."""
+    rng = np.random.default_rng(seed)
+    close = 0.9 + np.cumsum(rng.normal(0, 0.0008, rows))
+    open_ = np.concatenate(([close[0]], close[:-1]))
+    spread = np.abs(rng.normal(0, 0.0006, (2, rows)))
+    stamps = pd.date_range('2010-01-01', periods=rows, freq='h')
+    frame = pd.DataFrame({
+        'date': stamps.strftime('%d-%m-%Y'),
+        'time': stamps.strftime('%H:%M:%S'),
+        'Open': open_,
+        'High': np.maximum(open_, close) + spread[0],
+        'Low': np.minimum(open_, close) - spread[1],
+        'Close': close,
+        'Volume': rng.uniform(0, 100, rows),
+        'rsi14': rng.uniform(0, 100, rows),
+    })
+    frame.to_csv(path, index=False)
+    return path
+
+
+def bench_startup(csv_file=None, rows=500000):
+    """DataManager start-up time: CSV parse vs memory-mapped binary cache."""
+    with tempfile.TemporaryDirectory() as tmp:
+        if csv_file is None:
+            csv_file = make_synthetic_csv(os.path.join(tmp, 'bars.csv'), rows)
+        start = time.perf_counter()
+        DataManager(csv_file, use_cache=False)
+        parse = time.perf_counter() - start
+        DataManager(csv_file)  # writes the cache
+        start = time.perf_counter()
+        data_manager = DataManager(csv_file)
+        cached = time.perf_counter() - start
+        print(f"Rows:              {len(data_manager):,}")
+        print(f"CSV parse start:   {parse * 1000:,.1f} ms")
+        print(f"Cached mmap start: {cached * 1000:,.1f} ms")
+
+
+def bench_backtest(csv_file=None, rows=8760):
+    """Headless replay of a year of hourly bars with the RSI strategy."""
+    from backtest import rsi_signals, run_backtest
+    with tempfile.TemporaryDirectory() as tmp:
+        if csv_file is None:
+            csv_file = make_synthetic_csv(os.path.join(tmp, 'bars.csv'), rows)
+        data_manager = DataManager(csv_file, use_cache=False)
+        start = time.perf_counter()
+        result = run_backtest(data_manager, signals=rsi_signals(data_manager))
+        elapsed = time.perf_counter() - start
+        print(f"Bars:    {len(data_manager):,} ({len(data_manager) * 4:,} sub-ticks)")
+        print(f"Trades:  {result.metrics['trades']:,}")
+        print(f"Elapsed: {elapsed * 1000:,.1f} ms")
+
+
+def bench_trade_book(csv_file=None, history_sizes=(10000, 100000), open_count=10, count=2000):
+    """Per-tick trade bookkeeping with a long trade history: linear list scans vs the indexed TradeBook."""
+    import logging
+    from simulator import Simulator
+    logging.disable(logging.INFO)
+    with tempfile.TemporaryDirectory() as tmp:
+        if csv_file is None:
+            csv_file = make_synthetic_csv(os.path.join(tmp, 'bars.csv'), 1000)
+        data_manager = DataManager(csv_file, use_cache=False)
+    for history in history_sizes:
+        simulator = Simulator(data_manager)
+        for _ in range(history):
+            simulator.close_trade(simulator.open_trade("buy", stop_loss_pips=1000))
+        for _ in range(open_count):
+            simulator.open_trade("sell", stop_loss_pips=1000)
+        trades = simulator.trades
+        open_ids = [t.trade_id for t in simulator.get_open_trades()]
+
+        def linear_tick(count):
+            # what update_trades / get_open_trades / get_closed_trades / close_trade did with one flat list
+            for i in range(count):
+                [t for t in trades if t.close_time is None]
+                [t for t in trades if t.close_time is not None and not t.is_ai_trade]
+                for t in trades:
+                    if t.trade_id == open_ids[i % open_count] and t.close_time is None:
+                        break
+
+        def book_tick(count):
+            book = simulator.book
+            for i in range(count):
+                simulator.update_trades()
+                simulator.get_open_trades()
+                book.get_open(open_ids[i % open_count])
+
+        before = _rate(linear_tick, max(count // 100, 1))
+        after = _rate(book_tick, count)
+        print(f"{history:>7,} closed + {open_count} open trades: "
+              f"list scans {before:,.0f} ticks/s, TradeBook {after:,.0f} ticks/s ({after / before:,.0f}x)")
+    logging.disable(logging.NOTSET)
+
+
+def bench_positions(position_counts=(10, 100, 1000), count=2000):
+    """Stop-loss check plus mark-to-market of every open position per tick: per-trade loop vs position arrays."""
+    import logging
+    from simulator import Simulator
+    logging.disable(logging.INFO)
+    with tempfile.TemporaryDirectory() as tmp:
+        data_manager = DataManager(make_synthetic_csv(os.path.join(tmp, 'bars.csv'), 100), use_cache=False)
+    for positions in position_counts:
+        simulator = Simulator(data_manager)
+        for i in range(positions):
+            simulator.open_trade("buy" if i % 2 else "sell", stop_loss_pips=10000)
+        open_trades = simulator.get_open_trades()
+        price = data_manager.get_current_price()
+
+        def loop_tick(count):
+            for _ in range(count):
+                for trade in open_trades:
+                    stop_price = trade.entry_price - trade.stop_loss_pips * 0.0001 if trade.trade_type == "buy" else trade.entry_price + trade.stop_loss_pips * 0.0001
+                    (trade.trade_type == "buy" and price <= stop_price) or (trade.trade_type == "sell" and price >= stop_price)
+                    trade.get_profit(price)
+
+        def array_tick(count):
+            for _ in range(count):
+                simulator.update_trades()
+                simulator.get_unrealized_pnl(price)
+
+        before = _rate(loop_tick, count)
+        after = _rate(array_tick, count)
+        print(f"{positions:>5,} open positions: per-trade loop {before:,.0f} ticks/s, arrays {after:,.0f} ticks/s ({after / before:.1f}x)")
+    logging.disable(logging.NOTSET)
+
+
+def _api_load_client(n, port, seconds, results):
+    # One bot in its own process on a keep-alive connection, so the client's own Python work
+    # is not charged to the server process and its GIL
+    import http.client
+    import json
+    import random
+    conn = http.client.HTTPConnection('127.0.0.1', port)
+    headers = {"Content-Type": "application/json"}
+    rng = random.Random(n)
+    trade_ids = []
+    count = opened = 0
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        choice = rng.random()
+        if choice < 0.3:
+            conn.request("POST", "/open_trade", json.dumps({"trade_type": rng.choice(["buy", "sell"])}), headers)
+            response = conn.getresponse()
+            body = response.read()
+            if response.status == 200:
+                trade_ids.append(json.loads(body)["trade_id"])
+                opened += 1
+        elif choice < 0.6 and trade_ids:
+            conn.request("POST", "/close_trade", json.dumps({"trade_id": trade_ids.pop()}), headers)
+            conn.getresponse().read()
+        else:
+            conn.request("GET", "/current_data")
+            conn.getresponse().read()
+        count += 1
+    results.put((count, opened))
+
+
+def bench_api_load(csv_file=None, clients=16, seconds=5.0, port=5077):
+    """Many bot clients hammering the API (waitress) while the cursor moves; checks the books still balance."""
+    import logging
+    import multiprocessing
+    from waitress import create_server
+    from api import create_api
+    from simulator import Simulator
+    logging.disable(logging.INFO)
+    with tempfile.TemporaryDirectory() as tmp:
+        if csv_file is None:
+            csv_file = make_synthetic_csv(os.path.join(tmp, 'bars.csv'), 20000)
+        data_manager = DataManager(csv_file, use_cache=False)
+    simulator = Simulator(data_manager, initial_balance=INITIAL_BALANCE)
+    server = create_server(create_api(simulator), host='127.0.0.1', port=port, threads=clients)
+    threading.Thread(target=server.run, daemon=True).start()
+    stop = threading.Event()
+
+    def stepper():
+        while not stop.is_set():
+            data_manager.step_forward()
+            simulator.update_trades()
+            time.sleep(0.0005)
+
+    results = multiprocessing.Queue()
+    processes = [multiprocessing.Process(target=_api_load_client, args=(n, port, seconds, results))
+                 for n in range(clients)]
+    step_thread = threading.Thread(target=stepper)
+    start = time.perf_counter()
+    step_thread.start()
+    for process in processes:
+        process.start()
+    totals = [results.get() for _ in processes]
+    elapsed = time.perf_counter() - start
+    for process in processes:
+        process.join()
+    stop.set()
+    step_thread.join()
+    server.close()
+
+    requests_done = sum(count for count, _ in totals)
+    closed = simulator.book.closed
+    expected_balance = INITIAL_BALANCE + sum(t.get_profit(t.exit_price) for t in closed)
+    print(f"Requests:       {requests_done:,} in {elapsed:.1f} s ({requests_done / elapsed:,.0f} req/s, "
+          f"{clients} client processes, {os.cpu_count()} CPUs)")
+    print(f"Trades opened:  {sum(opened for _, opened in totals):,} (trade_counter={simulator.trade_counter:,}, "
+          f"book={len(simulator.book):,})")
+    print(f"Balance check:  {simulator.account_balance:.6f} vs {expected_balance:.6f} recomputed from closed trades")
+    logging.disable(logging.NOTSET)
+
+
+def _serve_api(port, threads=16, rows=2000):
+    from waitress import create_server
+    from api import create_api
+    from simulator import Simulator
+    with tempfile.TemporaryDirectory() as tmp:
+        data_manager = DataManager(make_synthetic_csv(os.path.join(tmp, 'bars.csv'), rows), use_cache=False)
+    server = create_server(create_api(Simulator(data_manager)), host='127.0.0.1', port=port, threads=threads)
+    threading.Thread(target=server.run, daemon=True).start()
+    return server
+
+
+def bench_clients(count=500, concurrency=20, port=5078):
+    """Trader-side /current_data polls per second: new connection per call, pooled keep-alive session, asyncio."""
+    import asyncio
+    import logging
+    import requests
+    from ai_trader import make_session
+    logging.disable(logging.INFO)
+    server = _serve_api(port)
+    url = f"http://127.0.0.1:{port}/current_data"
+
+    def fresh(count):
+        for _ in range(count):
+            requests.get(url).json()
+
+    session = make_session()
+
+    def pooled(count):
+        for _ in range(count):
+            session.get(url).json()
+
+    async def polls(count):
+        import aiohttp
+        async with aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=concurrency)) as client:
+            async def worker(n):
+                for _ in range(n):
+                    async with client.get(url) as response:
+                        await response.json()
+            await asyncio.gather(*(worker(count // concurrency) for _ in range(concurrency)))
+
+    print(f"requests.get per call:  {_rate(fresh, count):,.0f} req/s")
+    print(f"pooled Session:         {_rate(pooled, count):,.0f} req/s")
+    try:
+        print(f"aiohttp x{concurrency} tasks:      {_rate(lambda n: asyncio.run(polls(n)), count):,.0f} req/s")
+    except ImportError:
+        print("aiohttp is not installed; skipping the asyncio client")
+    server.close()
+    logging.disable(logging.NOTSET)
+
+
+def bench_transports(steps=2000, port=5079):
+    """AI trader decisions per second: HTTP round trips vs the in-process LocalTransport."""
+    import logging
+    from ai_trader import HttpTransport, LocalTransport, SimpleTrader
+    from simulator import Simulator
+    logging.disable(logging.INFO)
+    server = _serve_api(port)
+    with tempfile.TemporaryDirectory() as tmp:
+        data_manager = DataManager(make_synthetic_csv(os.path.join(tmp, 'bars.csv'), steps), use_cache=False)
+    transports = [("HTTP (pooled session)", HttpTransport(f"http://127.0.0.1:{port}")),
+                  ("in-process", LocalTransport(Simulator(data_manager), drive_clock=True))]
+    rates = []
+    for name, transport in transports:
+        trader = SimpleTrader(transport=transport, interval=0, epsilon=0.5, verbose=False)
+        count = steps // 10 if isinstance(transport, HttpTransport) else steps
+        rates.append(_rate(lambda n: trader.run(steps=n), count))
+        print(f"{name + ':':<23} {rates[-1]:,.0f} steps/s")
+    print(f"Speed-up:               {rates[1] / rates[0]:,.0f}x")
+    server.close()
+    logging.disable(logging.NOTSET)
+
+
+def bench_q_training(rows=20000, n_envs=256, steps=1000):
+    """Q-learning transitions per second: SimpleTrader's one-at-a-time update vs the batched QTrainer."""
+    from ai_trader import SimpleTrader
+    from q_trainer import QTrainer
+    with tempfile.TemporaryDirectory() as tmp:
+        data_manager = DataManager(make_synthetic_csv(os.path.join(tmp, 'bars.csv'), rows), use_cache=False)
+    rsi = data_manager.store.columns['rsi14']
+    trader = SimpleTrader()
+
+    def single(count):
+        # decision + Q-update only, no environment at all
+        for i in range(count):
+            trader.decide_action(rsi[i % rows])
+            trader.update_q_table(trader.get_reward(0.0), rsi[(i + 1) % rows])
+
+    before = _rate(single, 20000)
+    after = QTrainer(data_manager, n_envs=n_envs, seed=0).train(steps)
+    print(f"SimpleTrader, one transition at a time: {before:,.0f} transitions/s")
+    print(f"QTrainer, {n_envs} environments:          {after:,.0f} transitions/s ({after / before:.0f}x)")
+
+
+def bench_chart(rows=5000, frames=500):
+    """Replay chart frames per second: clearing and replotting the axes vs ChartRenderer's blitting."""
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+    from chart_renderer import ChartRenderer
+    from data_manager import SUB_TICKS
+    with tempfile.TemporaryDirectory() as tmp:
+        data_manager = DataManager(make_synthetic_csv(os.path.join(tmp, 'bars.csv'), rows), use_cache=False)
+    store = data_manager.store
+    start_position = 200 * SUB_TICKS
+
+    def make_canvas():
+        fig = Figure(figsize=(10, 4), dpi=100)
+        axes = fig.add_subplot(111)
+        return FigureCanvasAgg(fig), axes, axes.twinx()
+
+    def redraw(count):
+        # what update_plot did before: clear both axes, replot the window, draw everything
+        canvas, axes, ax2 = make_canvas()
+        for position in range(start_position, start_position + count):
+            index = position // SUB_TICKS
+            x = np.arange(index - 99, index + 1)
+            axes.clear()
+            ax2.clear()
+            axes.plot(x, store.close[index - 99:index + 1], color='blue', label='Close Price')
+            axes.plot(x, store.columns['sma20'][index - 99:index + 1], color='orange', label='SMA20')
+            ax2.plot(x, store.columns['rsi14'][index - 99:index + 1], color='green', linestyle='--', label='RSI14')
+            axes.legend(loc='upper left')
+            canvas.draw()
+
+    def blit(count):
+        canvas, axes, ax2 = make_canvas()
+        chart = ChartRenderer(canvas, axes, ax2, store)
+        chart.configure(use_candlestick=True, indicators=('sma20', 'rsi14'))
+        for position in range(start_position, start_position + count):
+            chart.render(position)
+        print(f"  ({chart.full_redraws} full redraws in {chart.frames} frames)")
+
+    before = _rate(redraw, frames // 5)
+    after = _rate(blit, frames)
+    print(f"Clear and redraw:        {before:,.0f} frames/s")
+    print(f"ChartRenderer, blitting: {after:,.0f} frames/s ({after / before:.0f}x)")
+
+
+def bench_lookups(csv_file=None, count=200000, rows=100000):
+    """Current price / current row lookups per second: DataFrame.iloc vs the NumPy bar store."""
+    with tempfile.TemporaryDirectory() as tmp:
+        if csv_file is None:
+            csv_file = make_synthetic_csv(os.path.join(tmp, 'bars.csv'), rows)
+        data_manager = DataManager(csv_file, use_cache=False)
+    frame = data_manager.data
+    n = len(data_manager)
+
+    def iloc_lookups(count):
+        for i in range(count):
+            row = frame.iloc[i % n]
+            sub_index = i & 3
+            if sub_index == 0:
+                row['Open']
+            elif sub_index == 1:
+                row['High'] if row['Close'] >= row['Open'] else row['Low']
+            elif sub_index == 2:
+                row['Low'] if row['Close'] >= row['Open'] else row['High']
+            else:
+                row['Close']
+            row['date_time']
+
+    def store_lookups(count):
+        for i in range(count):
+            data_manager.current_index = i % n
+            data_manager.sub_index = i & 3
+            data_manager.get_current_price()
+            data_manager.get_current_time()
+
+    # iloc is orders of magnitude slower, so time it on a smaller sample
+    before = _rate(iloc_lookups, max(count // 20, 1))
+    after = _rate(store_lookups, count)
+    print(f"DataFrame.iloc lookups/s: {before:,.0f}")
+    print(f"Bar store lookups/s:      {after:,.0f}")
+    print(f"Speed-up:                 {after / before:.1f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Performance benchmarks for the trading simulator")
+    parser.add_argument("benchmark", choices=["lookups", "startup", "backtest", "tradebook", "positions", "api", "clients", "transports", "qlearning", "chart"])
+    parser.add_argument("--csv", default=DATASET_FILE_PATH)
+    parser.add_argument("--count", type=int, default=200000)
+    parser.add_argument("--rows", type=int, default=None, help="size of the synthetic dataset when --csv is not given")
+    args = parser.parse_args()
+    if args.benchmark == "lookups":
+        bench_lookups(args.csv if os.path.exists(args.csv) else None, args.count, args.rows or 100000)
+    elif args.benchmark == "startup":
+        bench_startup(args.csv if os.path.exists(args.csv) else None, args.rows or 500000)
+    elif args.benchmark == "backtest":
+        bench_backtest(args.csv if os.path.exists(args.csv) else None, args.rows or 8760)
+    elif args.benchmark == "tradebook":
+        bench_trade_book(args.csv if os.path.exists(args.csv) else None)
+    elif args.benchmark == "positions":
+        bench_positions()
+    elif args.benchmark == "api":
+        bench_api_load(args.csv if os.path.exists(args.csv) else None)
+    elif args.benchmark == "clients":
+        bench_clients()
+    elif args.benchmark == "transports":
+        bench_transports()
+    elif args.benchmark == "qlearning":
+        bench_q_training(args.rows or 20000)
+    elif args.benchmark == "chart":
+        bench_chart(args.rows or 5000)
+
+
+if __name__ == '__main__':
+    main()
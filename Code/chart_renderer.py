@@ -0,0 +1,289 @@
+import time
+import weakref
+
+import numpy as np
+import matplotlib.dates as mdates
+from matplotlib.collections import PolyCollection
+from matplotlib.ticker import FuncFormatter, MaxNLocator
+
+from data_manager import SUB_TICKS
+
+# Indicator column -> (axis, label, line style); 'price' lines share the candles' axis, the others the right axis
+INDICATOR_STYLES = {
+    'sma20': ('price', 'SMA20', {'color': 'orange'}),
+    'sma50': ('price', 'SMA50', {'color': 'purple'}),
+    'sma200': ('price', 'SMA200', {'color': 'blue'}),
+    'rsi14': ('oscillator', 'RSI14', {'color': 'green', 'linestyle': '--'}),
+    'MACD': ('oscillator', 'MACD', {'color': 'red', 'linestyle': '-'}),
+}
+UP_COLOR = (0.0, 0.5, 0.0, 1.0)
+DOWN_COLOR = (1.0, 0.0, 0.0, 1.0)
+CANDLE_WIDTH = 0.6
+# Aggregated levels of an OHLCPyramid: name -> (bucket length, offset) in hours; the offset starts weeks on Monday
+LOD_PERIODS = {'4h': (4, 0), 'daily': (24, 0), 'weekly': (24 * 7, 72)}
+
+
+class CandleArtists:
+    """Candles as three artists: a PolyCollection of bodies and two NaN-separated wick polylines
+    (rising and falling bars), far cheaper to update and draw than a patch and a line per bar."""
+
+    def __init__(self, axes, animated=False):
+        self.up_wicks, = axes.plot([], [], color=UP_COLOR, linewidth=1, animated=animated)
+        self.down_wicks, = axes.plot([], [], color=DOWN_COLOR, linewidth=1, animated=animated)
+        self.bodies = PolyCollection([], edgecolors='black', linewidths=0.5, animated=animated)
+        axes.add_collection(self.bodies)
+        self.artists = [self.up_wicks, self.down_wicks, self.bodies]
+
+    def set_data(self, x, opens, highs, lows, closes, width=CANDLE_WIDTH):
+        x = np.asarray(x, dtype=np.float64)
+        verts = np.empty((len(x), 4, 2))
+        verts[:, :2, 0] = (x - width / 2)[:, None]
+        verts[:, 2:, 0] = (x + width / 2)[:, None]
+        verts[:, 0, 1] = verts[:, 3, 1] = opens
+        verts[:, 1, 1] = verts[:, 2, 1] = closes
+        rising = closes >= opens
+        self.bodies.set_verts(verts)
+        self.bodies.set_facecolor(np.where(rising[:, None], UP_COLOR, DOWN_COLOR))
+        for wicks, mask in ((self.up_wicks, rising), (self.down_wicks, ~rising)):
+            wick_x = np.repeat(x[mask], 3)
+            wick_y = np.column_stack((lows[mask], highs[mask], np.full(mask.sum(), np.nan))).ravel()
+            wick_x[2::3] = np.nan
+            wicks.set_data(wick_x, wick_y)
+
+    def set_visible(self, visible):
+        for artist in self.artists:
+            artist.set_visible(visible)
+
+
+class OHLCPyramid:
+    """The bars of a BarStore at several resolutions, for drawing long histories.
+
+    Level 0 is the bars themselves; the others aggregate them into 4-hour, daily and weekly candles
+    (levels no coarser than the bars are skipped). Every level holds candle centres as Matplotlib
+    date numbers with the OHLC arrays, so selecting the candles in view is two binary searches.
+    """
+
+    def __init__(self, store):
+        x = mdates.date2num(store.date_time)
+        spacing = float(np.median(np.diff(x))) if len(x) > 1 else 1 / 24
+        self.levels = [{'name': 'bars', 'x': x, 'width': spacing * CANDLE_WIDTH, 'open': store.open,
+                        'high': store.high, 'low': store.low, 'close': store.close}]
+        hours = store.date_time.astype('datetime64[h]').astype(np.int64)
+        for name, (period, offset) in LOD_PERIODS.items():
+            if period / 24 <= spacing or len(x) == 0:
+                continue
+            key = (hours + offset) // period
+            starts = np.flatnonzero(np.r_[True, key[1:] != key[:-1]])
+            ends = np.r_[starts[1:], len(key)]
+            self.levels.append({'name': name, 'x': (x[starts] + x[ends - 1]) / 2, 'width': period / 24 * CANDLE_WIDTH,
+                                'open': store.open[starts], 'high': np.maximum.reduceat(store.high, starts),
+                                'low': np.minimum.reduceat(store.low, starts), 'close': store.close[ends - 1]})
+
+    def pick(self, first, last, max_candles):
+        """Finest level with at most `max_candles` candles between date numbers first and last, and their slice."""
+        for level in self.levels:
+            lo, hi = np.searchsorted(level['x'], [first - level['width'], last + level['width']])
+            if hi - lo <= max_candles:
+                break
+        return level, slice(lo, hi)
+
+
+_pyramids = weakref.WeakKeyDictionary()
+
+
+def ohlc_pyramid(store):
+    """The OHLCPyramid of a bar store, built on first use."""
+    if store not in _pyramids:
+        _pyramids[store] = OHLCPyramid(store)
+    return _pyramids[store]
+
+
+class ChartRenderer:
+    """Replay chart drawn with persistent artists and blitting.
+
+    The x axis is the bar index, so candles are evenly spaced and the window needs no date maths.
+    Axes, ticks, labels and the legend form a cached background. It is only re-rendered when the
+    layout changes: an indicator or the chart type is toggled, the data leaves the y-range, or the
+    cursor leaves the current page (the x-range advances a quarter window at a time). Every other
+    frame restores the background, updates the candles, lines and markers in place and blits them.
+    The bar being replayed is drawn from the sub-ticks seen so far. `fps` is a running frame rate.
+    """
+
+    def __init__(self, canvas, axes, ax2, store, window_size=100):
+        self.canvas = canvas
+        self.fig = canvas.figure
+        self.axes = axes
+        self.ax2 = ax2
+        self.store = store
+        self.window_size = window_size
+        self.page_step = max(window_size // 4, 1)
+        self.use_candlestick = True
+        self.indicators = ()
+        self.page = None  # (first, last) bar index covered by the x-range
+        self.background = None
+        self.layout_dirty = True
+        self.legend = None
+        self.full_redraws = 0
+        self.frames = 0
+        self.fps = 0.0
+        self.last_frame = None
+
+        self.candles = CandleArtists(axes, animated=True)
+        self.close_line, = axes.plot([], [], color='blue', label='Close Price', animated=True)
+        self.lines = {}
+        for column, (axis, label, style) in INDICATOR_STYLES.items():
+            self.lines[column], = (axes if axis == 'price' else ax2).plot([], [], label=label, animated=True, **style)
+        self.entries, = axes.plot([], [], linestyle='none', marker='o', color='blue', markersize=8, animated=True)
+        self.exits, = axes.plot([], [], linestyle='none', marker='x', color='red', markersize=8, animated=True)
+        self.price_line, = axes.plot([], [], color='gray', linewidth=0.8, linestyle=':', animated=True)
+        self.animated = [*self.candles.artists, self.close_line, *self.lines.values(),
+                         self.entries, self.exits, self.price_line]
+
+        # Closed trades never change, so their marker coordinates are converted once and kept
+        self.marker_count = 0
+        self.marker_x = np.empty((0, 2), dtype=np.int64)  # entry bar, exit bar
+        self.marker_y = np.empty((0, 2))  # entry price, exit price
+
+        axes.set_autoscale_on(False)
+        ax2.set_autoscale_on(False)
+        axes.set_ylabel('Price', color='black')
+        axes.yaxis.set_label_position('left')
+        ax2.set_ylabel('RSI / MACD', color='black')
+        ax2.yaxis.set_label_position('right')
+        axes.xaxis.set_major_locator(MaxNLocator(6, integer=True))
+        axes.xaxis.set_major_formatter(FuncFormatter(self._format_date))
+        canvas.mpl_connect('draw_event', self._on_draw)
+
+    def _format_date(self, x, pos=None):
+        i = int(round(x))
+        if 0 <= i < len(self.store):
+            return np.datetime_as_string(self.store.date_time[i], unit='m').replace('T', '\n')
+        return ''
+
+    def configure(self, use_candlestick=True, indicators=()):
+        """Chart type and indicator columns to show; a change makes the next frame a full redraw."""
+        indicators = tuple(column for column in indicators if column in self.store.columns and column in self.lines)
+        if (use_candlestick, indicators) != (self.use_candlestick, self.indicators):
+            self.use_candlestick = use_candlestick
+            self.indicators = indicators
+            self.background = None
+            self.layout_dirty = True
+
+    def invalidate(self):
+        self.background = None
+
+    def _on_draw(self, event):
+        # Any full draw (ours, a resize, a toolbar action) refreshes the cached background
+        self.background = self.canvas.copy_from_bbox(self.fig.bbox)
+        self._draw_animated()
+
+    def _draw_animated(self):
+        for artist in self.animated:
+            if artist.get_visible():
+                self.fig.draw_artist(artist)
+
+    def _add_markers(self, closed_trades):
+        if len(closed_trades) < self.marker_count:  # a different (e.g. restored) trade list
+            self.marker_count = 0
+            self.marker_x = self.marker_x[:0]
+            self.marker_y = self.marker_y[:0]
+        new = closed_trades[self.marker_count:]
+        if not new:
+            return
+        times = np.array([[t.open_time, t.close_time] for t in new], dtype='datetime64[ns]')
+        bars = np.searchsorted(self.store.date_time, times, side='right') - 1
+        prices = np.array([[t.entry_price, t.exit_price] for t in new], dtype=np.float64)
+        self.marker_x = np.concatenate((self.marker_x, bars))
+        self.marker_y = np.concatenate((self.marker_y, prices))
+        self.marker_count = len(closed_trades)
+
+    @staticmethod
+    def _fit(axis, low, high, pad_fraction=0.15):
+        """Refit the y-range when the data leaves it or uses less than half of it; True if it changed."""
+        if not (np.isfinite(low) and np.isfinite(high)):
+            return False
+        current_low, current_high = axis.get_ylim()
+        if low >= current_low and high <= current_high and high - low >= 0.5 * (current_high - current_low):
+            return False
+        pad = (high - low) * pad_fraction or abs(high) * 1e-4 or 1.0
+        axis.set_ylim(low - pad, high + pad)
+        return True
+
+    def _relayout(self, first, last):
+        axes = self.axes
+        axes.set_xlim(first - 0.5, last + 0.5)
+        self.candles.set_visible(self.use_candlestick)
+        self.close_line.set_visible(not self.use_candlestick)
+        for column, line in self.lines.items():
+            line.set_visible(column in self.indicators)
+        self.ax2.set_visible(any(INDICATOR_STYLES[column][0] == 'oscillator' for column in self.indicators))
+        if self.layout_dirty:
+            if self.legend is not None:
+                self.legend.remove()
+            handles = ([] if self.use_candlestick else [self.close_line]) + [self.lines[c] for c in self.indicators]
+            self.legend = axes.legend(handles, [h.get_label() for h in handles], loc='upper left') if handles else None
+            self.fig.tight_layout()
+            self.layout_dirty = False
+
+    def render(self, position, closed_trades=()):
+        """Draw the chart at cursor `position` (bar index * SUB_TICKS + sub-tick)."""
+        store = self.store
+        index, sub_index = divmod(position, SUB_TICKS)
+        if index >= len(store):
+            index, sub_index = len(store) - 1, SUB_TICKS - 1
+        if self.page is None or not (self.page[0] + self.window_size - 1 <= index <= self.page[1]):
+            first = index - self.window_size + 1
+            self.page = (first, index + self.page_step)
+            self.background = None
+        first, last = self.page
+        lo = max(first, 0)
+
+        partial = store.bar_path(index)[:sub_index + 1]
+        x = np.arange(lo, index + 1)
+        opens = store.open[lo:index + 1]
+        highs = np.append(store.high[lo:index], partial.max())
+        lows = np.append(store.low[lo:index], partial.min())
+        closes = np.append(store.close[lo:index], partial[-1])
+
+        if self.use_candlestick:
+            self.candles.set_data(x, opens, highs, lows, closes)
+        else:
+            self.close_line.set_data(x, closes)
+
+        price_low, price_high = lows.min(), highs.max()
+        oscillator = []
+        for column in self.indicators:
+            values = store.columns[column][lo:index + 1]
+            self.lines[column].set_data(x, values)
+            if np.isnan(values).all():
+                continue
+            if INDICATOR_STYLES[column][0] == 'price':
+                price_low, price_high = min(price_low, np.nanmin(values)), max(price_high, np.nanmax(values))
+            else:
+                oscillator += [np.nanmin(values), np.nanmax(values)] + ([0.0, 100.0] if column == 'rsi14' else [])
+        if self._fit(self.axes, price_low, price_high):
+            self.background = None
+        if oscillator and self._fit(self.ax2, min(oscillator), max(oscillator), 0.05):
+            self.background = None
+
+        self._add_markers(closed_trades)
+        bars = self.marker_x
+        shown = (bars >= lo) & (bars <= index)
+        self.entries.set_data(bars[shown[:, 0], 0], self.marker_y[shown[:, 0], 0])
+        self.exits.set_data(bars[shown[:, 1], 1], self.marker_y[shown[:, 1], 1])
+        self.price_line.set_data([first - 0.5, last + 0.5], [closes[-1], closes[-1]])
+
+        now = time.perf_counter()
+        if self.last_frame is not None and now > self.last_frame:
+            self.fps = 1.0 / (now - self.last_frame) if self.frames < 2 else 0.9 * self.fps + 0.1 / (now - self.last_frame)
+        self.last_frame = now
+        self.frames += 1
+
+        if self.background is None:
+            self._relayout(first, last)
+            self.full_redraws += 1
+            self.canvas.draw()  # the draw_event handler captures the background and draws the data
+        else:
+            self.canvas.restore_region(self.background)
+            self._draw_animated()
+            self.canvas.blit(self.fig.bbox)
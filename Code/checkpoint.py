@@ -0,0 +1,108 @@
+import logging
+import os
+import threading
+import time
+
+import numpy as np
+
+CHECKPOINT_VERSION = 1
+
+logger = logging.getLogger(__name__)
+
+
+def collect(simulator=None, agents=None):
+    """In-memory snapshot: the simulator session (trades, balance, cursor) and each agent's q_table."""
+    arrays = {'version': np.int64(CHECKPOINT_VERSION), 'saved_at': np.float64(time.time())}
+    if simulator is not None:
+        arrays.update({'simulator/' + name: values for name, values in simulator.snapshot().items()})
+    for name, agent in (agents or {}).items():
+        # Copied without stopping the agent; a tabular Q-table torn between two updates is still usable
+        arrays['q_table/' + name] = np.array(agent.q_table, copy=True)
+    return arrays
+
+
+def write(path, arrays):
+    # Write next to the target and rename, so a crash mid-write leaves the previous checkpoint intact
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        np.savez(f, **arrays)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def save_checkpoint(path, simulator=None, agents=None):
+    """Save a binary .npz checkpoint; `agents` maps a name to any object with a q_table (traders, QTrainer)."""
+    write(path, collect(simulator, agents))
+
+
+def load_checkpoint(path, simulator=None, agents=None):
+    """Restore the given simulator and agents from a checkpoint; returns the raw arrays."""
+    with np.load(path) as data:
+        arrays = {name: data[name] for name in data.files}
+    if int(arrays.get('version', -1)) != CHECKPOINT_VERSION:
+        raise ValueError(f"Unsupported checkpoint version in {path}")
+    state = {name[len('simulator/'):]: values for name, values in arrays.items() if name.startswith('simulator/')}
+    if simulator is not None and state:
+        simulator.restore(state)
+    for name, agent in (agents or {}).items():
+        q_table = arrays.get('q_table/' + name)
+        if q_table is None:
+            continue
+        if q_table.shape != agent.q_table.shape:
+            raise ValueError(f"Checkpointed Q-table '{name}' has shape {q_table.shape}, expected {agent.q_table.shape}")
+        agent.q_table[...] = q_table
+    logger.info("Checkpoint %s restored (saved %s)", path, time.ctime(float(arrays['saved_at'])))
+    return arrays
+
+
+class Checkpointer:
+    """Saves a checkpoint every `interval` seconds on a background thread, and once more on stop().
+
+    The snapshot is taken under the simulator lock and the file is written outside it,
+    so trading and training carry on during the write.
+    """
+
+    def __init__(self, path, interval=60, simulator=None, agents=None):
+        self.path = path
+        self.interval = interval
+        self.simulator = simulator
+        self.agents = agents or {}
+        self.saves = 0
+        self.last_duration = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="checkpointer", daemon=True)
+        self._thread.start()
+        return self
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.save()
+
+    def save(self):
+        start = time.perf_counter()
+        try:
+            save_checkpoint(self.path, self.simulator, self.agents)
+        except Exception:
+            logger.exception("Checkpoint to %s failed", self.path)
+            return False
+        self.last_duration = time.perf_counter() - start
+        self.saves += 1
+        return True
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.save()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
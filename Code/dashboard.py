@@ -1,9 +1,15 @@
 from PyQt5 import QtWidgets, QtCore
 from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
 from matplotlib.figure import Figure
-import matplotlib.dates as mdates
-from concurrent.futures import ThreadPoolExecutor
-import queue
+import math
+from chart_renderer import ChartRenderer
+from data_manager import SUB_TICKS
+from replay import ReplayEngine
+from trade_models import OpenTradesModel
+
+PAINT_INTERVAL_MS = 33  # the dashboard repaints at about 30 fps whatever the replay speed
+MIN_TICK_MS, MAX_TICK_MS = 0.05, 5000  # play speed range, i.e. 20,000 down to 0.2 sub-ticks per second
+SPEED_STEPS = 1000  # resolution of the logarithmic speed slider
 
 class MplCanvas(FigureCanvas):
     def __init__(self, parent=None, width=8, height=5, dpi=100):
@@ -11,14 +17,6 @@ class MplCanvas(FigureCanvas):
         self.axes = self.fig.add_subplot(111)
         self.ax2 = self.axes.twinx()
         super(MplCanvas, self).__init__(self.fig)
-        self.last_drawn_index = -1
-        self.candles = None
-        self.line = None
-        self.sma20_line = None
-        self.sma50_line = None
-        self.sma200_line = None
-        self.rsi_line = None
-        self.macd_line = None
 
 class Dashboard(QtWidgets.QMainWindow):
     def __init__(self, data_manager, simulator):
@@ -36,9 +34,10 @@ class Dashboard(QtWidgets.QMainWindow):
         self.show_sma200 = False  # پیش‌فرض غیرفعال
         self.use_candlestick = True
         self.show_chart = False  # چارت به‌صورت پیش‌فرض خاموش
-        self.data_queue = queue.Queue()
-        self.executor = ThreadPoolExecutor(max_workers=50)
+        self.replay = ReplayEngine(simulator, rate=1000 / self.play_speed)
+        self.painted = None  # sequence of the last snapshot painted
         self.initUI()
+        self.replay.start()
 
     def initUI(self):
         self.setWindowTitle("AUD/CAD Trading Simulator")
@@ -47,11 +46,12 @@ class Dashboard(QtWidgets.QMainWindow):
         main_layout = QtWidgets.QVBoxLayout()
 
         self.canvas = MplCanvas(self, width=8, height=5, dpi=100)
+        self.chart = ChartRenderer(self.canvas, self.canvas.axes, self.canvas.ax2, self.data_manager.store)
         main_layout.addWidget(self.canvas)
 
         self.slider = QtWidgets.QSlider(QtCore.Qt.Horizontal)
         self.slider.setMinimum(0)
-        self.slider.setMaximum(len(self.data_manager.data) - 1)
+        self.slider.setMaximum(len(self.data_manager) - 1)
         self.slider.setValue(self.data_manager.current_index)
         self.slider.valueChanged.connect(self.slider_moved)
         main_layout.addWidget(self.slider)
@@ -62,12 +62,12 @@ class Dashboard(QtWidgets.QMainWindow):
         self.btn_play = QtWidgets.QPushButton("Play")
         self.btn_stop = QtWidgets.QPushButton("Stop")
         self.speed_slider = QtWidgets.QSlider(QtCore.Qt.Horizontal)
-        self.speed_slider.setMinimum(1)
-        self.speed_slider.setMaximum(5000)
-        self.speed_slider.setValue(self.play_speed)
-        self.speed_slider.setTickInterval(500)
+        self.speed_slider.setMinimum(0)
+        self.speed_slider.setMaximum(SPEED_STEPS)
+        self.speed_slider.setValue(self.speed_to_slider(self.play_speed))
+        self.speed_slider.setTickInterval(SPEED_STEPS // 10)
         self.speed_slider.setTickPosition(QtWidgets.QSlider.TicksBelow)
-        self.speed_label = QtWidgets.QLabel("Speed (ms):")
+        self.speed_label = QtWidgets.QLabel(f"Speed (ms): {self.play_speed:g}")
         self.btn_open_buy = QtWidgets.QPushButton("Open Buy")
         self.btn_open_sell = QtWidgets.QPushButton("Open Sell")
         self.btn_close_trade = QtWidgets.QPushButton("Close Trade (by ID)")
@@ -96,10 +96,12 @@ class Dashboard(QtWidgets.QMainWindow):
         self.status_label = QtWidgets.QLabel("System Status: ")
         self.current_price_label = QtWidgets.QLabel("Current Price: ")
         self.balance_label = QtWidgets.QLabel(f"Balance: {self.simulator.account_balance:.2f}")
+        self.fps_label = QtWidgets.QLabel("Replay: 0 ticks/s | Chart: off")
         status_layout = QtWidgets.QHBoxLayout()
         status_layout.addWidget(self.status_label)
         status_layout.addWidget(self.current_price_label)
         status_layout.addWidget(self.balance_label)
+        status_layout.addWidget(self.fps_label)
         main_layout.addLayout(status_layout)
 
         risk_layout = QtWidgets.QHBoxLayout()
@@ -117,9 +119,11 @@ class Dashboard(QtWidgets.QMainWindow):
         risk_layout.addWidget(self.leverage_input)
         main_layout.addLayout(risk_layout)
 
-        self.open_trades_table = QtWidgets.QTableWidget()
-        self.open_trades_table.setColumnCount(7)
-        self.open_trades_table.setHorizontalHeaderLabels(["Trade ID", "Type", "Entry Price", "Size", "P&L", "Leverage", "Status"])
+        self.open_trades_model = OpenTradesModel(self)
+        self.open_trades_table = QtWidgets.QTableView()
+        self.open_trades_table.setModel(self.open_trades_model)
+        self.open_trades_table.setSortingEnabled(True)
+        self.open_trades_table.sortByColumn(0, QtCore.Qt.AscendingOrder)
         main_layout.addWidget(self.open_trades_table)
 
         central_widget.setLayout(main_layout)
@@ -154,6 +158,10 @@ class Dashboard(QtWidgets.QMainWindow):
         self.balance_action.triggered.connect(self.set_initial_balance)
         settings_menu.addAction(self.balance_action)
 
+        self.goto_action = QtWidgets.QAction('Go to Date...', self)
+        self.goto_action.triggered.connect(self.go_to_date)
+        settings_menu.addAction(self.goto_action)
+
         self.candlestick_action = QtWidgets.QAction('Candlestick', self, checkable=True)
         self.candlestick_action.setChecked(True)
         self.candlestick_action.triggered.connect(self.set_candlestick)
@@ -166,7 +174,7 @@ class Dashboard(QtWidgets.QMainWindow):
         self.btn_backward.clicked.connect(self.step_backward)
         self.btn_play.clicked.connect(self.start_playing)
         self.btn_stop.clicked.connect(self.stop_playing)
-        self.speed_slider.valueChanged.connect(self.set_play_speed)
+        self.speed_slider.valueChanged.connect(self.speed_slider_moved)
         self.btn_open_buy.clicked.connect(lambda: self.open_trade("buy"))
         self.btn_open_sell.clicked.connect(lambda: self.open_trade("sell"))
         self.btn_close_trade.clicked.connect(self.close_trade)
@@ -183,7 +191,7 @@ class Dashboard(QtWidgets.QMainWindow):
         self.canvas.setVisible(self.show_chart)  # چارت به‌صورت پیش‌فرض مخفی
 
         self.timer = QtCore.QTimer()
-        self.timer.setInterval(100)
+        self.timer.setInterval(PAINT_INTERVAL_MS)
         self.timer.timeout.connect(self.update_dashboard)
         self.timer.start()
 
@@ -197,6 +205,17 @@ class Dashboard(QtWidgets.QMainWindow):
             self.balance_label.setText(f"Balance: {self.simulator.account_balance:.2f}")
             self.status_label.setText(f"Initial balance set to {balance:.2f}")
 
+    def go_to_date(self):
+        text, ok = QtWidgets.QInputDialog.getText(self, "Go to Date", "Date/time (e.g. 2006-04-03 12:00):")
+        if not ok or not text:
+            return
+        try:
+            self.data_manager.seek_to_timestamp(text)
+        except ValueError:
+            self.status_label.setText("Invalid date")
+            return
+        self.status_label.setText(f"Jumped to {self.data_manager.get_current_time()}")
+
     def toggle_rsi(self):
         self.show_rsi = self.rsi_action.isChecked()
         self.update_plot()
@@ -221,6 +240,7 @@ class Dashboard(QtWidgets.QMainWindow):
         self.show_chart = self.chart_action.isChecked()
         if self.show_chart:
             self.canvas.setVisible(True)
+            self.chart.invalidate()
             self.update_plot()
         else:
             self.canvas.setVisible(False)
@@ -238,32 +258,34 @@ class Dashboard(QtWidgets.QMainWindow):
         self.update_plot()
 
     def slider_moved(self, value):
-        self.data_manager.current_index = value
-        self.data_manager.sub_index = 0
-        self.fetch_data()
+        self.data_manager.seek(value * SUB_TICKS)
 
     def step_forward(self):
         self.data_manager.step_forward()
-        self.slider.setValue(self.data_manager.current_index)
-        self.fetch_data()
 
     def step_backward(self):
         self.data_manager.step_backward()
-        self.slider.setValue(self.data_manager.current_index)
-        self.fetch_data()
 
     def start_playing(self):
         self.is_playing = True
-        self.timer.setInterval(self.play_speed)
+        self.replay.play(1000 / self.play_speed)
 
     def stop_playing(self):
         self.is_playing = False
-        self.timer.setInterval(500)
+        self.replay.pause()
+
+    @staticmethod
+    def speed_to_slider(ms):
+        return round(SPEED_STEPS * math.log(ms / MIN_TICK_MS) / math.log(MAX_TICK_MS / MIN_TICK_MS))
+
+    def speed_slider_moved(self, value):
+        self.set_play_speed(MIN_TICK_MS * (MAX_TICK_MS / MIN_TICK_MS) ** (value / SPEED_STEPS))
 
     def set_play_speed(self, value):
-        self.play_speed = max(1, value)  # جلوگیری از تأخیر صفر
-        if self.is_playing:
-            self.timer.setInterval(self.play_speed)
+        """Milliseconds per sub-tick while playing."""
+        self.play_speed = min(max(MIN_TICK_MS, value), MAX_TICK_MS)  # جلوگیری از تأخیر صفر
+        self.speed_label.setText(f"Speed (ms): {self.play_speed:.3g}")
+        self.replay.set_rate(1000 / self.play_speed)
 
     def open_trade(self, trade_type):
         try:
@@ -278,7 +300,7 @@ class Dashboard(QtWidgets.QMainWindow):
                 self.status_label.setText(f"Opened {trade_type} trade with ID {trade_id}, leverage {leverage}, size {size}")
             else:
                 self.status_label.setText("Failed to open trade.")
-            self.fetch_data()
+            self.replay.refresh()
         except ValueError:
             self.status_label.setText("Invalid Risk, Stop Loss, or Leverage value")
 
@@ -292,10 +314,9 @@ class Dashboard(QtWidgets.QMainWindow):
         profit = self.simulator.close_trade(trade_id)
         if profit is not None:
             self.status_label.setText(f"Closed trade {trade_id} with profit: {profit:.4f}")
-            self.balance_label.setText(f"Balance: {self.simulator.account_balance:.2f}")
         else:
             self.status_label.setText("Trade not found or already closed.")
-        self.fetch_data()
+        self.replay.refresh()
 
     def open_trade_history_chart(self):
         from trade_history import TradeHistoryChart
@@ -314,168 +335,41 @@ class Dashboard(QtWidgets.QMainWindow):
         msg.setText(report)
         msg.exec_()
 
-    def fetch_data(self):
-        def fetch_data_worker():
-            data_window = self.data_manager.get_data_window()
-            current_data = self.data_manager.get_current_data()
-            current_price = self.data_manager.get_current_price()
-            self.data_queue.put((data_window, current_data, current_price))
-
-        def fetch_trades_worker():
-            open_trades = self.simulator.get_open_trades()
-            closed_trades = self.simulator.get_closed_trades()
-            self.data_queue.put((None, None, None, open_trades, closed_trades))
-
-        self.executor.submit(fetch_data_worker)
-        self.executor.submit(fetch_trades_worker)
+    def visible_indicators(self):
+        shown = {'sma20': self.show_sma20, 'sma50': self.show_sma50, 'sma200': self.show_sma200,
+                 'rsi14': self.show_rsi, 'MACD': self.show_macd}
+        return tuple(column for column, visible in shown.items() if visible)
 
     def update_plot(self):
-        if not self.show_chart:
-        # اگر چارت خاموش باشد، فقط داده‌های جدول معاملات باز را به‌روزرسانی می‌کنیم
-            while not self.data_queue.empty():
-                data = self.data_queue.get()
-                if len(data) == 3:
-                    data_window, current_data, current_price = data
-                    open_trades = self.simulator.get_open_trades()
-                else:
-                    _, _, _, open_trades, closed_trades = data
-                    current_price = self.data_manager.get_current_price()
-
-                self.open_trades_table.setRowCount(len(open_trades))
-                for row, trade in enumerate(open_trades):
-                    current_pnl = trade.get_profit(current_price) if current_price is not None else 0
-                    self.open_trades_table.setItem(row, 0, QtWidgets.QTableWidgetItem(str(trade.trade_id)))
-                    self.open_trades_table.setItem(row, 1, QtWidgets.QTableWidgetItem(trade.trade_type))
-                    self.open_trades_table.setItem(row, 2, QtWidgets.QTableWidgetItem(f"{trade.entry_price:.5f}"))
-                    self.open_trades_table.setItem(row, 3, QtWidgets.QTableWidgetItem(f"{trade.size:.2f}"))
-                    self.open_trades_table.setItem(row, 4, QtWidgets.QTableWidgetItem(f"{current_pnl:.2f}"))
-                    self.open_trades_table.setItem(row, 5, QtWidgets.QTableWidgetItem(f"{trade.leverage}"))
-                    self.open_trades_table.setItem(row, 6, QtWidgets.QTableWidgetItem("Open (AI)" if trade.is_ai_trade else "Open"))
-            return
-        
-        
-        while not self.data_queue.empty():
-            data = self.data_queue.get()
-            if len(data) == 3:
-                data_window, current_data, current_price = data
-                open_trades = self.simulator.get_open_trades()
-                closed_trades = self.simulator.get_closed_trades()
-            else:
-                _, _, _, open_trades, closed_trades = data
-                data_window = self.data_manager.get_data_window()
-                current_data = self.data_manager.get_current_data()
-                current_price = self.data_manager.get_current_price()
-
-            if not data_window.empty:
-                dates = mdates.date2num(data_window['date_time'])
-
-                if self.canvas.last_drawn_index != self.data_manager.current_index:
-                    self.canvas.axes.clear()
-                    self.canvas.ax2.clear()
-                    if self.use_candlestick:
-                        ohlc_data = list(zip(dates, data_window['Open'], data_window['High'], 
-                                             data_window['Low'], data_window['Close']))
-                        from mpl_finance import candlestick_ohlc
-                        self.canvas.candles = candlestick_ohlc(self.canvas.axes, ohlc_data, 
-                                                               width=0.6/(24*60), colorup='g', colordown='r')
-                        self.canvas.line = None
-                    else:
-                        self.canvas.line, = self.canvas.axes.plot(dates, data_window['Close'], color='blue', label='Close Price')
-                        self.canvas.candles = None
-                    
-                    self.canvas.axes.set_ylabel('Price', color='black')
-                    self.canvas.axes.yaxis.set_label_position('left')
-                    self.canvas.axes.tick_params(axis='y', labelcolor='black', which='both', left=True, right=False)
-                    self.canvas.ax2.set_ylabel('RSI / MACD', color='black')
-                    self.canvas.ax2.yaxis.set_label_position('right')
-                    self.canvas.ax2.tick_params(axis='y', labelcolor='black', which='both', left=False, right=True)
-                    self.canvas.last_drawn_index = self.data_manager.current_index
-
-                # چک کردن وجود ستون‌ها قبل از رسم
-                if self.show_sma20 and 'sma20' in data_window.columns and not data_window['sma20'].isna().all():
-                    if self.canvas.sma20_line is None:
-                        self.canvas.sma20_line, = self.canvas.axes.plot(dates, data_window['sma20'], label='SMA20', color='orange')
-                    else:
-                        self.canvas.sma20_line.set_data(dates, data_window['sma20'])
-                elif self.canvas.sma20_line:
-                    self.canvas.sma20_line.set_data([], [])
-                
-                if self.show_sma50 and 'sma50' in data_window.columns and not data_window['sma50'].isna().all():
-                    if self.canvas.sma50_line is None:
-                        self.canvas.sma50_line, = self.canvas.axes.plot(dates, data_window['sma50'], label='SMA50', color='purple')
-                    else:
-                        self.canvas.sma50_line.set_data(dates, data_window['sma50'])
-                elif self.canvas.sma50_line:
-                    self.canvas.sma50_line.set_data([], [])
-                
-                if self.show_sma200 and 'sma200' in data_window.columns and not data_window['sma200'].isna().all():
-                    if self.canvas.sma200_line is None:
-                        self.canvas.sma200_line, = self.canvas.axes.plot(dates, data_window['sma200'], label='SMA200', color='blue')
-                    else:
-                        self.canvas.sma200_line.set_data(dates, data_window['sma200'])
-                elif self.canvas.sma200_line:
-                    self.canvas.sma200_line.set_data([], [])
-
-                if self.show_rsi and 'rsi14' in data_window.columns and not data_window['rsi14'].isna().all():
-                    if self.canvas.rsi_line is None:
-                        self.canvas.rsi_line, = self.canvas.ax2.plot(dates, data_window['rsi14'], label='RSI14', color='green', linestyle='--')
-                        self.canvas.ax2.set_ylim(0, 100)
-                    else:
-                        self.canvas.rsi_line.set_data(dates, data_window['rsi14'])
-                elif self.canvas.rsi_line:
-                    self.canvas.rsi_line.set_data([], [])
-
-                if self.show_macd and 'MACD' in data_window.columns and not data_window['MACD'].isna().all():
-                    if self.canvas.macd_line is None:
-                        self.canvas.macd_line, = self.canvas.ax2.plot(dates, data_window['MACD'], label='MACD', color='red', linestyle='-')
-                    else:
-                        self.canvas.macd_line.set_data(dates, data_window['MACD'])
-                elif self.canvas.macd_line:
-                    self.canvas.macd_line.set_data([], [])
-
-                for collection in self.canvas.axes.collections[:]:
-                    collection.remove()
-                window_start = data_window['date_time'].iloc[0]
-                window_end = data_window['date_time'].iloc[-1]
-                for trade in closed_trades:
-                    if window_start <= trade.open_time <= window_end:
-                        entry_time = mdates.date2num(trade.open_time)
-                        self.canvas.axes.plot(entry_time, trade.entry_price, marker='o', color='blue', markersize=8)
-                    if trade.close_time and window_start <= trade.close_time <= window_end:
-                        exit_time = mdates.date2num(trade.close_time)
-                        self.canvas.axes.plot(exit_time, trade.exit_price, marker='x', color='red', markersize=8)
-
-                self.canvas.axes.set_xlim(dates[0] - 0.5, dates[-1] + 0.5)
-                self.canvas.axes.xaxis_date()
-                lines, labels = self.canvas.axes.get_legend_handles_labels()
-                lines2, labels2 = self.canvas.ax2.get_legend_handles_labels()
-                self.canvas.axes.legend(lines + lines2, labels + labels2, loc='upper left')
-                self.canvas.fig.tight_layout()
-                self.canvas.draw()
-
-                self.open_trades_table.setRowCount(len(open_trades))
-                for row, trade in enumerate(open_trades):
-                    current_pnl = trade.get_profit(current_price) if current_price is not None else 0
-                    self.open_trades_table.setItem(row, 0, QtWidgets.QTableWidgetItem(str(trade.trade_id)))
-                    self.open_trades_table.setItem(row, 1, QtWidgets.QTableWidgetItem(trade.trade_type))
-                    self.open_trades_table.setItem(row, 2, QtWidgets.QTableWidgetItem(f"{trade.entry_price:.5f}"))
-                    self.open_trades_table.setItem(row, 3, QtWidgets.QTableWidgetItem(f"{trade.size:.2f}"))
-                    self.open_trades_table.setItem(row, 4, QtWidgets.QTableWidgetItem(f"{current_pnl:.2f}"))
-                    self.open_trades_table.setItem(row, 5, QtWidgets.QTableWidgetItem(f"{trade.leverage}"))
-                    self.open_trades_table.setItem(row, 6, QtWidgets.QTableWidgetItem("Open (AI)" if trade.is_ai_trade else "Open"))
+        # Paint the newest snapshot; the states published since the previous paint are simply skipped
+        snapshot = self.replay.latest
+        if self.show_chart:
+            self.chart.configure(self.use_candlestick, self.visible_indicators())
+            self.chart.render(snapshot.position, snapshot.closed_log[:snapshot.closed_count])
+        self.update_open_trades_table(snapshot)
+
+    def update_open_trades_table(self, snapshot):
+        # The model only repaints the P&L cells unless trades were opened or closed
+        self.open_trades_model.update(list(snapshot.open_trades), snapshot.pnl)
 
     def update_dashboard(self):
-        if self.is_playing:
-            self.step_forward()
-        self.executor.submit(self.simulator.update_trades)
-        self.fetch_data()
+        snapshot = self.replay.latest
+        if snapshot.sequence == self.painted:
+            return
+        self.painted = snapshot.sequence
         self.update_plot()
-        current_price = self.data_manager.get_current_price()
-        if current_price is not None:
-            self.current_price_label.setText(f"Current Price: {current_price:.5f}")
+        if self.is_playing and not self.replay.playing:  # the replay reached the end of the data
+            self.is_playing = False
+        self.slider.blockSignals(True)  # following the cursor must not seek it
+        self.slider.setValue(snapshot.position // SUB_TICKS)
+        self.slider.blockSignals(False)
+        if snapshot.price is not None:
+            self.current_price_label.setText(f"Current Price: {snapshot.price:.5f}")
         else:
             self.current_price_label.setText("Current Price: N/A")
-        self.balance_label.setText(f"Balance: {self.simulator.account_balance:.2f}")
+        self.balance_label.setText(f"Balance: {snapshot.balance:.2f}")
+        chart = f"{self.chart.fps:.0f} fps" if self.show_chart else "off"
+        self.fps_label.setText(f"Replay: {snapshot.ticks_per_second:,.0f} ticks/s | Chart: {chart}")
 
     def keyPressEvent(self, event):
         if event.key() == QtCore.Qt.Key_Left:
@@ -486,5 +380,5 @@ class Dashboard(QtWidgets.QMainWindow):
             super(Dashboard, self).keyPressEvent(event)
 
     def closeEvent(self, event):
-        self.executor.shutdown()
+        self.replay.stop()
         super().closeEvent(event)
\ No newline at end of file
@@ -1,47 +1,350 @@
+import json
+import logging
+import os
+import shutil
+import threading
+
+import numpy as np
 import pandas as pd
 
-class DataManager:
-    def __init__(self, csv_file):
-        self.data = pd.read_csv(csv_file, parse_dates=[['date', 'time']])
-        self.data.sort_values('date_time', inplace=True)
-        self.current_index = 0
-        self.sub_index = 0
+from indicators import add_missing_indicators, compute
+
+PRICE_COLUMNS = ('Open', 'High', 'Low', 'Close')
+SUB_TICKS = 4  # Open, High-or-Low, Low-or-High, Close
+CACHE_VERSION = 2
+
+
+def read_csv_bars(csv_file):
+    """Read a broker CSV export and return it as a DataFrame sorted by date_time."""
+    frame = pd.read_csv(csv_file, dtype={'date': str, 'time': str})
+    if 'date_time' not in frame.columns:
+        stamps = frame.pop('date').astype(str) + ' ' + frame.pop('time').astype(str)
+        frame.insert(0, 'date_time', pd.to_datetime(stamps, dayfirst=True))
+    else:
+        frame['date_time'] = pd.to_datetime(frame['date_time'])
+    frame.dropna(subset=['date_time'], inplace=True)
+    frame.sort_values('date_time', inplace=True, kind='stable')
+    frame.reset_index(drop=True, inplace=True)
+    return frame
+
+
+class Bar:
+    """Read-only view of one row of a BarStore (replaces the per-row pandas Series)."""
+    __slots__ = ('_store', '_index')
+
+    def __init__(self, store, index):
+        self._store = store
+        self._index = index
+
+    @property
+    def name(self):
+        return self._index
+
+    def __getitem__(self, key):
+        return self._store.value(key, self._index)
+
+    def __contains__(self, key):
+        return key in self._store.columns
+
+    def get(self, key, default=None):
+        if key not in self._store.columns:
+            return default
+        return self._store.value(key, self._index)
+
+    def keys(self):
+        return self._store.columns.keys()
+
+    def to_dict(self):
+        return {key: self._store.value(key, self._index) for key in self._store.columns}
+
+
+class BarStore:
+    """Contiguous NumPy columns for the timestamp, OHLCV and indicator data."""
+
+    def __init__(self, columns, path=None):
+        self.columns = {name: np.ascontiguousarray(values) for name, values in columns.items()}
+        self.date_time = self.columns['date_time']
+        self.open = self.columns['Open']
+        self.high = self.columns['High']
+        self.low = self.columns['Low']
+        self.close = self.columns['Close']
+        self._path = path
+
+    @classmethod
+    def from_frame(cls, frame):
+        columns = {}
+        for name in frame.columns:
+            if name == 'date_time':
+                columns[name] = frame[name].to_numpy(dtype='datetime64[ns]')
+            elif pd.api.types.is_numeric_dtype(frame[name]):
+                columns[name] = frame[name].to_numpy(dtype=np.float64)
+            else:
+                columns[name] = frame[name].to_numpy()
+        return cls(columns)
+
+    def __len__(self):
+        return len(self.date_time)
+
+    @property
+    def path(self):
+        """Sub-tick price path of every bar, shape (n, 4): Open, High-or-Low, Low-or-High, Close.
+
+        Memory-mapped from the cache when there is one, otherwise built in memory on first use; for
+        single bars use bar_path(), which never builds the whole array.
+        """
+        if self._path is None:
+            bullish = self.close >= self.open
+            path = np.empty((len(self), 4), dtype=np.float64)
+            path[:, 0] = self.open
+            path[:, 1] = np.where(bullish, self.high, self.low)
+            path[:, 2] = np.where(bullish, self.low, self.high)
+            path[:, 3] = self.close
+            self._path = path
+        return self._path
+
+    def bar_path(self, index):
+        """Sub-tick price path of one bar."""
+        if self._path is not None:
+            return self._path[index]
+        o, h, l, c = self.open[index], self.high[index], self.low[index], self.close[index]
+        return np.array((o, h, l, c) if c >= o else (o, l, h, c))
+
+    def value(self, column, index):
+        if column == 'date_time':
+            return pd.Timestamp(self.date_time[index])
+        return self.columns[column][index]
+
+    def time(self, index):
+        return pd.Timestamp(self.date_time[index])
+
+    def price(self, index, sub_index):
+        if self._path is not None:
+            return self._path[index, sub_index]
+        if sub_index == 0:
+            return self.open[index]
+        if sub_index == 3:
+            return self.close[index]
+        bullish = self.close[index] >= self.open[index]
+        return self.high[index] if bullish == (sub_index == 1) else self.low[index]
+
+    def row(self, index):
+        return Bar(self, index)
+
+    def frame(self, start=0, stop=None):
+        return pd.DataFrame({name: values[start:stop] for name, values in self.columns.items()})
+
+
+def cache_dir_for(csv_file):
+    return csv_file + '.cache'
+
+
+def _source_signature(csv_file):
+    stat = os.stat(csv_file)
+    return {"version": CACHE_VERSION, "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+def write_cache(store, csv_file):
+    """Write one typed .npy file per column next to the CSV, tagged with the CSV's size/mtime."""
+    cache_dir = cache_dir_for(csv_file)
+    tmp_dir = cache_dir + '.tmp%d' % os.getpid()
+    os.makedirs(tmp_dir, exist_ok=True)
+    names = []
+    for name, values in store.columns.items():
+        if values.dtype == object:
+            continue  # object columns cannot be memory-mapped
+        np.save(os.path.join(tmp_dir, '%d.npy' % len(names)), values)
+        names.append(name)
+    # The sub-tick path too, so it is memory-mapped like the columns instead of rebuilt in memory
+    np.save(os.path.join(tmp_dir, 'path.npy'), store.path)
+    meta = dict(_source_signature(csv_file), columns=names, rows=len(store))
+    with open(os.path.join(tmp_dir, 'meta.json'), 'w') as f:
+        json.dump(meta, f)
+    shutil.rmtree(cache_dir, ignore_errors=True)
+    os.replace(tmp_dir, cache_dir)
+
+
+def read_cache(csv_file, mmap_mode='r'):
+    """Memory-map a valid cache for csv_file, or return None if it is missing or stale."""
+    cache_dir = cache_dir_for(csv_file)
+    try:
+        with open(os.path.join(cache_dir, 'meta.json')) as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return None
+    signature = _source_signature(csv_file)
+    if any(meta.get(key) != value for key, value in signature.items()):
+        return None
+    # A half-written or older cache (missing, truncated or mis-sized files) is rebuilt from the CSV
+    try:
+        columns = {}
+        for position, name in enumerate(meta['columns']):
+            columns[name] = np.load(os.path.join(cache_dir, '%d.npy' % position), mmap_mode=mmap_mode)
+        path = np.load(os.path.join(cache_dir, 'path.npy'), mmap_mode=mmap_mode)
+    except (OSError, ValueError, KeyError):
+        return None
+    rows = meta.get('rows')
+    if any(len(values) != rows for values in columns.values()) or path.shape != (rows, SUB_TICKS):
+        return None
+    return BarStore(columns, path)
+
+
+def load_bar_store(csv_file, use_cache=True):
+    if use_cache:
+        store = read_cache(csv_file)
+        if store is not None:
+            add_missing_indicators(store)
+            return store
+    store = BarStore.from_frame(read_csv_bars(csv_file))
+    # Raw broker exports only have OHLCV; fill in the indicator columns before caching
+    add_missing_indicators(store)
+    if use_cache:
+        try:
+            write_cache(store, csv_file)
+        except OSError as e:
+            logging.warning(f"Could not write dataset cache for {csv_file}: {e}")
+    return store
+
+
+def require_single_symbol(data_manager, user):
+    """Raise TypeError unless `data_manager` replays one instrument (a DataManager with a bar store).
+
+    MultiDataManager is supported by the Simulator and the trading API only; whole-dataset tools
+    (backtests, training, the replay dashboard) run on one symbol, e.g. multi.data_manager('EURUSD').
+    """
+    if not isinstance(data_manager, DataManager):
+        raise TypeError(f"{user} needs a single-symbol DataManager, got {type(data_manager).__name__}; "
+                        f"pass multi.data_manager(symbol) to run it on one symbol")
+
+
+class SubTickCursor:
+    """Replay cursor kept as one global sub-tick position: bar = position // 4, sub-tick = position % 4."""
+    _position = 0
+    _listeners = ()
+
+    def __init__(self):
+        # Serialises read-modify-write moves; readers take one snapshot of `position`
+        self.cursor_lock = threading.RLock()
+        self._position = 0
+
+    def _timestamps(self):
+        raise NotImplementedError
+
+    @property
+    def position(self):
+        return self._position
+
+    @position.setter
+    def position(self, value):
+        changed = value != self._position
+        self._position = value
+        if changed:
+            for listener in self._listeners:
+                listener(self)
+
+    def add_listener(self, callback):
+        """Call callback(cursor) whenever the cursor moves, on the thread that moved it."""
+        self._listeners = self._listeners + (callback,)
+
+    def remove_listener(self, callback):
+        self._listeners = tuple(listener for listener in self._listeners if listener != callback)
+
+    @property
+    def current_index(self):
+        return self.position // SUB_TICKS
+
+    @current_index.setter
+    def current_index(self, value):
+        with self.cursor_lock:
+            self.position = value * SUB_TICKS + self.position % SUB_TICKS
+
+    @property
+    def sub_index(self):
+        return self.position % SUB_TICKS
+
+    @sub_index.setter
+    def sub_index(self, value):
+        with self.cursor_lock:
+            self.position = self.position - self.position % SUB_TICKS + value
+
+    def seek(self, position):
+        with self.cursor_lock:
+            self.position = min(max(position, 0), len(self) * SUB_TICKS - 1)
+
+    def step_forward(self, steps=1):
+        with self.cursor_lock:
+            self.seek(self.position + steps)
+
+    def step_backward(self, steps=1):
+        with self.cursor_lock:
+            self.seek(self.position - steps)
+
+    def seek_to_timestamp(self, timestamp, sub_index=0):
+        """Jump to the last bar at or before timestamp (binary search); returns the new bar index."""
+        target = np.datetime64(pd.Timestamp(timestamp).to_datetime64(), 'ns')
+        index = int(np.searchsorted(self._timestamps(), target, side='right')) - 1
+        self.seek(max(index, 0) * SUB_TICKS + sub_index)
+        return self.current_index
+
+
+class DataManager(SubTickCursor):
+    def __init__(self, csv_file, use_cache=True):
+        super().__init__()
+        self.csv_file = csv_file
+        self.store = load_bar_store(csv_file, use_cache)
+        self._data = None
+
+    def _timestamps(self):
+        return self.store.date_time
+
+    def fork(self):
+        """A DataManager with its own cursor over the same (read-only) bar store."""
+        clone = DataManager.__new__(DataManager)
+        SubTickCursor.__init__(clone)
+        clone.csv_file = self.csv_file
+        clone.store = self.store
+        clone._data = None
+        return clone
+
+    @property
+    def data(self):
+        # Full DataFrame view, only materialised for callers that still need pandas
+        if self._data is None:
+            self._data = self.store.frame()
+        return self._data
+
+    def __len__(self):
+        return len(self.store)
+
+    def add_indicator(self, name, kind, *params):
+        """Compute one extra indicator column (e.g. add_indicator('sma100', 'sma', 100)) over the whole history."""
+        store = self.store
+        store.columns[name] = compute(kind, params, store.high, store.low, store.close)
+        self._data = None
 
     def get_current_data(self):
-        if self.current_index < len(self.data):
-            return self.data.iloc[self.current_index]
+        if self.current_index < len(self.store):
+            return self.store.row(self.current_index)
         return None
 
     def get_current_price(self):
-        if self.current_index >= len(self.data):
+        index, sub_index = divmod(self.position, SUB_TICKS)
+        if index >= len(self.store):
             return None
-        row = self.data.iloc[self.current_index]
-        if self.sub_index == 0:
-            return row['Open']
-        elif self.sub_index == 1:
-            return row['High'] if row['Close'] >= row['Open'] else row['Low']
-        elif self.sub_index == 2:
-            return row['Low'] if row['Close'] >= row['Open'] else row['High']
-        elif self.sub_index == 3:
-            return row['Close']
-        return None
+        return self.store.price(index, sub_index)
 
-    def step_forward(self, steps=1):
-        for _ in range(steps):
-            if self.sub_index < 3:
-                self.sub_index += 1
-            else:
-                self.sub_index = 0
-                self.current_index = min(self.current_index + 1, len(self.data) - 1)
+    def get_current_time(self):
+        if self.current_index < len(self.store):
+            return self.store.time(self.current_index)
+        return None
 
-    def step_backward(self, steps=1):
-        for _ in range(steps):
-            if self.sub_index > 0:
-                self.sub_index -= 1
-            else:
-                self.sub_index = 3
-                self.current_index = max(self.current_index - 1, 0)
+    def get_value(self, column, default=None):
+        """Value of `column` at the current bar; `default` past the end, for unknown columns and for NaN
+        (an indicator still warming up), so callers can put the result straight into JSON."""
+        if self.current_index >= len(self.store) or column not in self.store.columns:
+            return default
+        value = self.store.columns[column][self.current_index]
+        return default if value != value else value
 
     def get_data_window(self, window_size=100):  # حداکثر 100 کندل
         start = max(self.current_index - window_size + 1, 0)
-        return self.data.iloc[start:self.current_index + 1]
\ No newline at end of file
+        return self.store.frame(start, self.current_index + 1)
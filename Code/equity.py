@@ -0,0 +1,113 @@
+import numpy as np
+import pandas as pd
+
+
+class EquityRecorder:
+    """Per-tick account history in NumPy column buffers with bounded memory.
+
+    record() writes one row (simulated time, balance, equity including unrealized P&L, margin used and
+    the number of open positions) in O(1). The buffers start small and double as needed up to
+    `capacity` rows; from then on they are a ring and the oldest rows are overwritten (`dropped`
+    counts them), so a long session never holds more than `capacity` rows. extend() appends a
+    whole series at once. A row earlier than the last one (the replay was rewound) first discards
+    the rows after its time, so the history stays in time order. save() writes the columns to a
+    .npz file; load_equity() reads it back.
+    """
+    FIELDS = (('time', np.int64), ('balance', np.float64), ('equity', np.float64), ('margin', np.float64),
+              ('positions', np.int32))
+
+    def __init__(self, capacity=1_000_000, initial_capacity=4096):
+        self.capacity = capacity
+        size = min(capacity, initial_capacity)
+        for name, dtype in self.FIELDS:
+            setattr(self, name, np.zeros(size, dtype=dtype))
+        self.clear()
+
+    def __len__(self):
+        return self.count - self.first
+
+    def _grow(self, needed):
+        # Only while the buffers are smaller than capacity, i.e. before they wrap: rows are 0..count-1
+        size = len(self.time)
+        while size < needed:
+            size = min(size * 2, self.capacity)
+        for name, dtype in self.FIELDS:
+            values = getattr(self, name)
+            grown = np.zeros(size, dtype=dtype)
+            grown[:self.count] = values[:self.count]
+            setattr(self, name, grown)
+
+    def _slots(self):
+        # Buffer slot of every kept row, oldest first; rows are numbered from the first one ever recorded
+        return np.arange(self.first, self.count) % len(self.time)
+
+    def truncate(self, time_ns):
+        """Discard the rows recorded after `time_ns`."""
+        times = self.time[self._slots()]
+        self.count = self.first + int(np.searchsorted(times, time_ns, side='right'))
+
+    def record(self, time_ns, balance, equity, margin, positions):
+        size = len(self.time)
+        if self.count > self.first and time_ns < self.time[(self.count - 1) % size]:
+            self.truncate(time_ns)
+        if self.count == size and size < self.capacity:
+            self._grow(self.count + 1)
+            size = len(self.time)
+        slot = self.count % size
+        self.time[slot] = time_ns
+        self.balance[slot] = balance
+        self.equity[slot] = equity
+        self.margin[slot] = margin
+        self.positions[slot] = positions
+        self.count += 1
+        if self.count - self.first > self.capacity:
+            self.first += 1
+            self.dropped += 1
+
+    def extend(self, time_ns, balance, equity, margin, positions):
+        """record() every row of equally long columns in one vectorized pass."""
+        columns = (time_ns, balance, equity, margin, positions)
+        n = len(time_ns)
+        if n == 0:
+            return
+        if self.count > self.first and time_ns[0] < self.time[(self.count - 1) % len(self.time)]:
+            self.truncate(time_ns[0])
+        needed = min(self.count + n, self.capacity)
+        if needed > len(self.time):
+            self._grow(needed)
+        keep = min(n, self.capacity)  # rows that survive the wrap-around
+        slots = np.arange(self.count + n - keep, self.count + n) % len(self.time)
+        for (name, dtype), values in zip(self.FIELDS, columns):
+            getattr(self, name)[slots] = np.asarray(values, dtype=dtype)[n - keep:]
+        self.count += n
+        excess = len(self) - self.capacity
+        if excess > 0:
+            self.first += excess
+            self.dropped += excess
+
+    def clear(self):
+        self.count = 0  # number of the next row
+        self.first = 0  # number of the oldest row kept
+        self.dropped = 0  # rows overwritten once the ring was full
+
+    def to_arrays(self):
+        """The recorded rows in time order, one array per column; time as datetime64[ns]."""
+        slots = self._slots()
+        arrays = {name: getattr(self, name)[slots] for name, _ in self.FIELDS}
+        arrays['time'] = arrays['time'].view('M8[ns]')
+        return arrays
+
+    def to_frame(self):
+        return pd.DataFrame(self.to_arrays())
+
+    def save(self, path):
+        """Write the columns to `path` as an uncompressed .npz archive (one array per column)."""
+        with open(path, 'wb') as f:
+            np.savez(f, **self.to_arrays())
+        return path
+
+
+def load_equity(path):
+    """An equity file written by EquityRecorder.save() as a pandas DataFrame."""
+    with np.load(path) as data:
+        return pd.DataFrame({name: data[name] for name, _ in EquityRecorder.FIELDS})
@@ -0,0 +1,97 @@
+import weakref
+
+import numpy as np
+
+from data_manager import require_single_symbol
+
+# Feature name -> (source, rule, parameters). The source is a column, or a pair of columns whose
+# difference is used. 'bands' gives 0 below low, 1 between (and for NaN), 2 above high, which is
+# SimpleTrader.get_state's rule for RSI; 'above' gives 1 when the value is above the threshold.
+DEFAULT_FEATURES = {
+    'rsi': ('rsi14', 'bands', (30, 70)),  # oversold / normal / overbought
+    'trend': (('sma20', 'sma50'), 'above', (0,)),  # fast SMA above slow SMA
+    'price': (('Close', 'sma20'), 'above', (0,)),  # price above the fast SMA
+    'macd': ('MACD', 'above', (0,)),
+    'adx': ('ADX', 'bands', (20, 40)),  # weak / trending / strong
+    'cci': ('CCI', 'bands', (-100, 100)),
+}
+RSI_ONLY = {'rsi': DEFAULT_FEATURES['rsi']}
+
+BUCKETS = {'bands': 3, 'above': 2}
+
+
+def source_values(store, source):
+    if isinstance(source, str):
+        return np.asarray(store.columns[source], dtype=np.float64)
+    first, second = source
+    return np.asarray(store.columns[first], dtype=np.float64) - store.columns[second]
+
+
+def bucketize(values, rule, params):
+    if rule == 'bands':
+        low, high = params
+        buckets = np.ones(len(values), dtype=np.uint8)
+        buckets[values < low] = 0
+        buckets[values > high] = 2
+        return buckets
+    if rule == 'above':
+        return (values > params[0]).astype(np.uint8)
+    raise ValueError(f"Unknown feature rule: {rule}")
+
+
+class FeatureSet:
+    """Discretized state (and normalized features) of every bar, computed once for the whole dataset.
+
+    `states[i]` packs the buckets of bar i into one small integer (mixed radix, first feature most
+    significant), so the agent's state lookup is a single array read. `values` holds the same
+    features as z-scored float32 columns (NaN -> 0) for function approximators.
+    """
+
+    def __init__(self, store, features=None):
+        self.features = dict(features or DEFAULT_FEATURES)
+        self.names = list(self.features)
+        self.sizes = np.array([BUCKETS[rule] for _, rule, _ in self.features.values()])
+        self.n_states = int(np.prod(self.sizes))
+        self.strides = np.cumprod(np.append(self.sizes[1:], 1)[::-1])[::-1]
+        dtype = np.uint8 if self.n_states <= 256 else np.uint16 if self.n_states <= 65536 else np.int32
+
+        states = np.zeros(len(store), dtype=np.int64)
+        values = np.zeros((len(store), len(self.names)), dtype=np.float32)
+        for k, (source, rule, params) in enumerate(self.features.values()):
+            raw = source_values(store, source)
+            states += bucketize(raw, rule, params).astype(np.int64) * self.strides[k]
+            std = np.nanstd(raw)
+            if std > 0:
+                values[:, k] = np.nan_to_num((raw - np.nanmean(raw)) / std)
+        self.states = states.astype(dtype)
+        self.values = values
+
+    def __len__(self):
+        return len(self.states)
+
+    def state(self, index):
+        return int(self.states[index])
+
+    def vector(self, index):
+        return self.values[index]
+
+    def encode(self, buckets):
+        return int(np.dot(buckets, self.strides))
+
+    def decode(self, state):
+        """Bucket of every feature, by name."""
+        return {name: int(state // stride % size) for name, stride, size in zip(self.names, self.strides, self.sizes)}
+
+
+_feature_sets = weakref.WeakKeyDictionary()
+
+
+def feature_set(data_manager, features=None):
+    """The FeatureSet of a DataManager's bars; built once per bar store and feature spec, shared by forks."""
+    require_single_symbol(data_manager, "feature_set")
+    store = data_manager.store
+    cached = _feature_sets.setdefault(store, {})
+    key = repr(sorted((features or DEFAULT_FEATURES).items()))
+    if key not in cached:
+        cached[key] = FeatureSet(store, features)
+    return cached[key]
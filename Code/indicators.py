@@ -0,0 +1,240 @@
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+# Column name -> (indicator, parameters) for the columns the dashboard and the traders read
+DEFAULT_INDICATORS = {
+    'rsi14': ('rsi', (14,)),
+    'sma20': ('sma', (20,)),
+    'sma50': ('sma', (50,)),
+    'sma200': ('sma', (200,)),
+    'ADX': ('adx', (14,)),
+    'CCI': ('cci', (20,)),
+    'MACD': ('macd', (12, 26)),
+}
+
+
+# --- Bulk computation over the whole history (vectorized) ---
+# RSI and ADX use simple moving averages of gains/losses and of TR/DM, which is
+# how the columns in the shipped datasets were produced.
+
+def _rolling_mean(values, period):
+    return pd.Series(values).rolling(period).mean().to_numpy()
+
+
+def _ema(values, span, min_periods):
+    return pd.Series(values).ewm(span=span, adjust=False, min_periods=min_periods).mean().to_numpy()
+
+
+def _rsi_from_averages(gain, loss):
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(loss == 0, 100.0, 100.0 - 100.0 / (1.0 + gain / loss))
+
+
+def _dx(plus, minus, tr):
+    with np.errstate(divide='ignore', invalid='ignore'):
+        plus_di = 100.0 * plus / tr
+        minus_di = 100.0 * minus / tr
+        return 100.0 * np.abs(plus_di - minus_di) / (plus_di + minus_di)
+
+
+def sma(close, period):
+    return _rolling_mean(close, period)
+
+
+def rsi(close, period=14):
+    delta = np.diff(close, prepend=np.nan)
+    gain = _rolling_mean(np.where(delta < 0, 0.0, delta), period)
+    loss = _rolling_mean(np.where(delta > 0, 0.0, -delta), period)
+    out = _rsi_from_averages(gain, loss)
+    out[np.isnan(gain)] = np.nan
+    return out
+
+
+def macd(close, fast=12, slow=26):
+    return _ema(close, fast, slow) - _ema(close, slow, slow)
+
+
+def adx(high, low, close, period=14):
+    prev_close = np.concatenate(([np.nan], close[:-1]))
+    up = np.diff(high, prepend=np.nan)
+    down = -np.diff(low, prepend=np.nan)
+    tr = np.fmax(high - low, np.fmax(np.abs(high - prev_close), np.abs(low - prev_close)))
+    tr[0] = np.nan
+    plus = np.where((up > down) & (up > 0), up, 0.0)
+    minus = np.where((down > up) & (down > 0), down, 0.0)
+    plus[0] = minus[0] = np.nan
+    dx = _dx(_rolling_mean(plus, period), _rolling_mean(minus, period), _rolling_mean(tr, period))
+    return _rolling_mean(dx, period)
+
+
+def cci(high, low, close, period=20):
+    typical = (high + low + close) / 3.0
+    out = np.full(len(typical), np.nan)
+    if len(typical) >= period:
+        windows = np.lib.stride_tricks.sliding_window_view(typical, period)
+        mean = windows.mean(axis=1)
+        deviation = np.abs(windows - mean[:, None]).mean(axis=1)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            out[period - 1:] = (typical[period - 1:] - mean) / (0.015 * deviation)
+    return out
+
+
+def compute(kind, params, high, low, close):
+    if kind == 'sma':
+        return sma(close, *params)
+    if kind == 'rsi':
+        return rsi(close, *params)
+    if kind == 'macd':
+        return macd(close, *params)
+    if kind == 'adx':
+        return adx(high, low, close, *params)
+    if kind == 'cci':
+        return cci(high, low, close, *params)
+    raise ValueError(f"Unknown indicator: {kind}")
+
+
+def add_missing_indicators(store, indicators=None):
+    """Compute, in bulk, every indicator column the store does not already have. Returns the added names."""
+    added = []
+    for name, (kind, params) in (indicators or DEFAULT_INDICATORS).items():
+        if name not in store.columns:
+            store.columns[name] = compute(kind, params, store.high, store.low, store.close)
+            added.append(name)
+    return added
+
+
+# --- Incremental computation, O(1) state update per new bar (O(period) for CCI) ---
+
+class _RollingMean:
+    def __init__(self, period):
+        self.period = period
+        self.window = deque()
+        self.total = 0.0
+
+    def update(self, x):
+        if x != x:  # NaN restarts the window, like pandas' rolling mean
+            self.window.clear()
+            self.total = 0.0
+            return np.nan
+        self.window.append(x)
+        self.total += x
+        if len(self.window) > self.period:
+            self.total -= self.window.popleft()
+        return self.total / self.period if len(self.window) == self.period else np.nan
+
+
+class _Smoother:
+    def __init__(self, alpha, min_periods):
+        self.alpha = alpha
+        self.min_periods = min_periods
+        self.value = None
+        self.count = 0
+
+    def update(self, x):
+        self.value = x if self.value is None else self.value + self.alpha * (x - self.value)
+        self.count += 1
+        return self.value if self.count >= self.min_periods else np.nan
+
+
+class SMA:
+    def __init__(self, period):
+        self.mean = _RollingMean(period)
+
+    def update(self, high, low, close):
+        return self.mean.update(close)
+
+
+class RSI:
+    def __init__(self, period=14):
+        self.gain = _RollingMean(period)
+        self.loss = _RollingMean(period)
+        self.prev_close = None
+
+    def update(self, high, low, close):
+        if self.prev_close is None:
+            self.prev_close = close
+            return np.nan
+        delta = close - self.prev_close
+        self.prev_close = close
+        gain = self.gain.update(max(delta, 0.0))
+        loss = self.loss.update(max(-delta, 0.0))
+        if np.isnan(gain):
+            return np.nan
+        return float(_rsi_from_averages(gain, loss))
+
+
+class MACD:
+    def __init__(self, fast=12, slow=26):
+        self.fast = _Smoother(2.0 / (fast + 1), slow)
+        self.slow = _Smoother(2.0 / (slow + 1), slow)
+
+    def update(self, high, low, close):
+        return self.fast.update(close) - self.slow.update(close)
+
+
+class ADX:
+    def __init__(self, period=14):
+        self.tr = _RollingMean(period)
+        self.plus = _RollingMean(period)
+        self.minus = _RollingMean(period)
+        self.adx = _RollingMean(period)
+        self.prev = None
+
+    def update(self, high, low, close):
+        if self.prev is None:
+            self.prev = (high, low, close)
+            return np.nan
+        prev_high, prev_low, prev_close = self.prev
+        self.prev = (high, low, close)
+        up = high - prev_high
+        down = prev_low - low
+        tr = max(high - low, abs(high - prev_close), abs(low - prev_close))
+        plus = self.plus.update(up if up > down and up > 0 else 0.0)
+        minus = self.minus.update(down if down > up and down > 0 else 0.0)
+        atr = self.tr.update(tr)
+        if np.isnan(atr):
+            return np.nan
+        return self.adx.update(float(_dx(plus, minus, atr)))
+
+
+class CCI:
+    def __init__(self, period=20):
+        self.period = period
+        self.window = deque(maxlen=period)
+
+    def update(self, high, low, close):
+        typical = (high + low + close) / 3.0
+        self.window.append(typical)
+        if len(self.window) < self.period:
+            return np.nan
+        mean = sum(self.window) / self.period
+        deviation = sum(abs(x - mean) for x in self.window) / self.period
+        return (typical - mean) / (0.015 * deviation) if deviation else np.nan
+
+
+STREAMING = {'sma': SMA, 'rsi': RSI, 'macd': MACD, 'adx': ADX, 'cci': CCI}
+
+
+class IndicatorEngine:
+    """Streaming indicators for bars that arrive one at a time (e.g. a raw broker feed)."""
+
+    def __init__(self, indicators=None):
+        self.indicators = {}
+        for name, (kind, params) in (indicators or DEFAULT_INDICATORS).items():
+            self.add(name, kind, *params)
+        self.values = {name: np.nan for name in self.indicators}
+
+    def add(self, name, kind, *params):
+        self.indicators[name] = STREAMING[kind](*params)
+
+    def update(self, high, low, close):
+        for name, indicator in self.indicators.items():
+            self.values[name] = indicator.update(high, low, close)
+        return self.values
+
+    def warm_up(self, high, low, close):
+        for h, l, c in zip(high, low, close):
+            self.update(float(h), float(l), float(c))
+        return self.values
@@ -0,0 +1,128 @@
+import atexit
+import logging
+import logging.handlers
+import queue
+import threading
+
+import numpy as np
+import pandas as pd
+
+LOG_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+TRADE_LOGGER = 'simulator'  # the human-readable per-trade messages; see human_logging()
+
+_STOP = object()
+EVENTS = ('open', 'close', 'stop', 'balance')
+# One fixed-size binary record per event; read a journal back with read_journal(). side is 1 buy, -1 sell
+# (0 for balance events), time is the simulated time of the event, and missing numbers are NaN.
+JOURNAL_DTYPE = np.dtype([('event', 'u1'), ('side', 'i1'), ('ai', '?'), ('trade_id', '<i8'), ('time', '<M8[ns]'),
+                          ('price', '<f8'), ('size', '<f8'), ('leverage', '<f8'), ('profit', '<f8'),
+                          ('balance', '<f8'), ('symbol', 'S12')])
+
+
+class _DeferredQueueHandler(logging.handlers.QueueHandler):
+    # The stock handler formats every message on the calling thread; leave that to the listener.
+    # Safe here because log arguments are numbers and strings that nobody mutates afterwards.
+    def prepare(self, record):
+        return record
+
+
+def setup_logging(log_file, level=logging.INFO):
+    """Send the root logger's records through a queue to a file written by a background thread.
+
+    Like logging.basicConfig, does nothing if the root logger already has handlers.
+    """
+    root = logging.getLogger()
+    if root.handlers:
+        return None
+    records = queue.SimpleQueue()
+    file_handler = logging.FileHandler(log_file)
+    file_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+    listener = logging.handlers.QueueListener(records, file_handler)
+    root.addHandler(_DeferredQueueHandler(records))
+    root.setLevel(level)
+    listener.start()
+    atexit.register(listener.stop)
+    return listener
+
+
+def human_logging(enabled):
+    """Switch the per-trade log messages on or off, e.g. off for headless backtests and sweeps."""
+    logging.getLogger(TRADE_LOGGER).setLevel(logging.NOTSET if enabled else logging.WARNING)
+
+
+class TradeJournal:
+    """Trade events appended to `path` as binary JOURNAL_DTYPE records by a background thread.
+
+    record() only puts a tuple of raw values on a queue. The writer converts whatever has queued up
+    (up to `batch_size` events) into one NumPy record array and writes it in a single call, so a
+    burst of trades costs one write and no per-event formatting.
+    """
+
+    def __init__(self, path, batch_size=4096):
+        self.path = path
+        self.batch_size = batch_size
+        self.written = 0
+        self._queue = queue.SimpleQueue()
+        self._thread = threading.Thread(target=self._run, name="trade-journal", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def record(self, event, trade, price, profit=None, balance=None):
+        """Queue an 'open', 'close', 'stop' or 'balance' event (trade is None for 'balance')."""
+        # The trade itself is queued: the fields the writer reads (id, side, size, open or close time)
+        # no longer change once the event has happened
+        self._queue.put((event, trade, price, profit, balance))
+
+    @staticmethod
+    def _records(batch):
+        records = np.zeros(len(batch), dtype=JOURNAL_DTYPE)
+        rows = []
+        for event, trade, price, profit, balance in batch:
+            if trade is None:
+                rows.append((EVENTS.index(event), 0, False, 0, None, price, np.nan, np.nan, profit, balance, b''))
+            else:
+                rows.append((EVENTS.index(event), 1 if trade.trade_type == "buy" else -1, trade.is_ai_trade,
+                             trade.trade_id, trade.open_time if event == 'open' else trade.close_time, price,
+                             trade.size, trade.leverage, profit, balance, (trade.symbol or '').encode()))
+        columns = list(zip(*rows))
+        for k, name in enumerate(JOURNAL_DTYPE.names):
+            if name == 'time':
+                records[name] = [np.datetime64('NaT') if t is None else np.datetime64(t, 'ns') for t in columns[k]]
+            elif JOURNAL_DTYPE[name].kind == 'f':
+                records[name] = [np.nan if value is None else value for value in columns[k]]
+            else:
+                records[name] = columns[k]
+        return records
+
+    def _run(self):
+        with open(self.path, 'ab') as f:
+            while True:
+                batch = [self._queue.get()]
+                while len(batch) < self.batch_size:
+                    try:
+                        batch.append(self._queue.get_nowait())
+                    except queue.Empty:
+                        break
+                stop = any(event is _STOP for event in batch)
+                events = [event for event in batch if event is not _STOP]
+                if events:
+                    f.write(self._records(events).tobytes())
+                    f.flush()
+                    self.written += len(events)
+                if stop:
+                    return
+
+    def close(self):
+        """Write everything recorded so far and stop the writer."""
+        if self._thread.is_alive():
+            self._queue.put(_STOP)
+            self._thread.join()
+
+
+def read_journal(path):
+    """A journal file as a pandas DataFrame with the event names spelled out."""
+    records = np.fromfile(path, dtype=JOURNAL_DTYPE)
+    frame = pd.DataFrame({name: records[name] for name in JOURNAL_DTYPE.names})
+    frame['event'] = np.array(EVENTS)[records['event']]
+    frame['symbol'] = frame['symbol'].str.decode('utf-8')
+    return frame
@@ -1,28 +1,50 @@
 import sys
+import logging
 from PyQt5 import QtWidgets
 from data_manager import DataManager
 from simulator import Simulator
 from dashboard import Dashboard
-from api import create_api
+from api import create_api, start_stream_server
+from tick_stream import TickStream
+from journal import TradeJournal
+from equity import EquityRecorder
 import queue, threading
 from DEFINEs import *
 
 def run_api(simulator):
-    app = create_api(simulator)
-    app.run(port=5000, debug=False, use_reloader=False)
+    try:
+        from waitress import serve
+    except ImportError:
+        logging.warning("waitress is not installed; falling back to Flask's development server")
+        app = create_api(simulator)
+        app.run(host=API_HOST, port=API_PORT, debug=False, use_reloader=False, threaded=True)
+        return
+    # Multi-threaded production WSGI server (works on Windows too); one thread per in-flight request.
+    # SSE streams never finish, so they get their own thread-per-connection server and /stream redirects there
+    tick_stream = TickStream(simulator)
+    try:
+        start_stream_server(tick_stream, API_HOST, API_STREAM_PORT)
+        app = create_api(simulator, tick_stream, stream_port=API_STREAM_PORT)
+    except OSError as e:
+        logging.warning("Stream server could not start (%s); serving at most %s streams from the pool", e, API_THREADS // 2)
+        app = create_api(simulator, tick_stream, max_streams=API_THREADS // 2)
+    # A lookahead lets waitress notice clients that hang up mid-response, which frees their stream slots
+    serve(app, host=API_HOST, port=API_PORT, threads=API_THREADS, channel_request_lookahead=1)
 
 def main():
     data_manager = DataManager(DATASET_FILE_PATH)
-    simulator = Simulator(data_manager)
+    simulator = Simulator(data_manager, journal=TradeJournal(JOURNAL_FILE_PATH), recorder=EquityRecorder(EQUITY_CAPACITY))
 
-    api_thread = threading.Thread(target=run_api, args=(simulator,))
-    api_thread.setDaemon(True)
+    api_thread = threading.Thread(target=run_api, args=(simulator,), daemon=True)
     api_thread.start()
 
     app = QtWidgets.QApplication(sys.argv)
     dashboard = Dashboard(data_manager, simulator)
     dashboard.show()
-    sys.exit(app.exec_())
+    exit_code = app.exec_()
+    with simulator.lock:
+        simulator.recorder.save(EQUITY_FILE_PATH)
+    sys.exit(exit_code)
 
 if __name__ == '__main__':
     main()
\ No newline at end of file
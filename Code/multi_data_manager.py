@@ -0,0 +1,123 @@
+import glob
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+from data_manager import DataManager, SubTickCursor, SUB_TICKS
+
+
+class MultiDataManager(SubTickCursor):
+    """Several instruments replayed as one time-ordered stream of bars.
+
+    Each symbol keeps its own DataManager (memory-mapped from its binary cache when
+    there is one). A precomputed merge index orders every bar of every symbol by
+    timestamp; the cursor walks that merged stream with the usual four sub-ticks per bar.
+    """
+
+    def __init__(self, symbol_files, use_cache=True):
+        super().__init__()
+        self.symbols = list(symbol_files)
+        self.symbol_ids = {symbol: i for i, symbol in enumerate(self.symbols)}
+        self.managers = [DataManager(symbol_files[symbol], use_cache) for symbol in self.symbols]
+
+        times = np.concatenate([m.store.date_time for m in self.managers])
+        owners = np.concatenate([np.full(len(m), i, dtype=np.int32) for i, m in enumerate(self.managers)])
+        rows = np.concatenate([np.arange(len(m), dtype=np.int64) for m in self.managers])
+        order = np.argsort(times, kind='stable')
+        self.event_time = times[order]
+        self.event_symbol = owners[order]
+        self.event_row = rows[order]
+        # Position of every bar in the merged stream, per symbol (increasing, because the sort is stable)
+        self.event_positions = [np.flatnonzero(self.event_symbol == i) for i in range(len(self.symbols))]
+
+        self._synced_index = None
+        self._sync_lock = threading.Lock()
+        self.last_row = np.full(len(self.symbols), -1, dtype=np.int64)
+
+    @classmethod
+    def from_directory(cls, directory, pattern='*.csv', use_cache=True):
+        """One symbol per CSV file; 'AUDCAD_Dataset.csv' becomes symbol 'AUDCAD'."""
+        files = sorted(glob.glob(os.path.join(directory, pattern)))
+        return cls({os.path.basename(path).split('_')[0].split('.')[0]: path for path in files}, use_cache)
+
+    def __len__(self):
+        return len(self.event_time)
+
+    def _timestamps(self):
+        return self.event_time
+
+    def _sync(self):
+        # Bring last_row (latest bar of every symbol at or before the cursor) up to date
+        index = min(self.current_index, len(self) - 1)
+        with self._sync_lock:
+            previous = self._synced_index
+            if previous == index:
+                return
+            if previous is not None and 0 < index - previous <= 64:
+                for event in range(previous + 1, index + 1):
+                    self.last_row[self.event_symbol[event]] = self.event_row[event]
+            else:
+                for i, positions in enumerate(self.event_positions):
+                    self.last_row[i] = np.searchsorted(positions, index, side='right') - 1
+            self._synced_index = index
+
+    def _symbol_id(self, symbol):
+        if symbol is None:
+            return int(self.event_symbol[self.current_index]) if self.current_index < len(self) else None
+        return self.symbol_ids[symbol]
+
+    @property
+    def current_symbol(self):
+        symbol_id = self._symbol_id(None)
+        return None if symbol_id is None else self.symbols[symbol_id]
+
+    def data_manager(self, symbol):
+        return self.managers[self.symbol_ids[symbol]]
+
+    def get_current_price(self, symbol=None):
+        """Price of `symbol` now: the sub-tick price if its bar is the one being replayed, else its last close."""
+        index, sub_index = divmod(self.position, SUB_TICKS)
+        if index >= len(self):
+            return None
+        symbol_id = self.event_symbol[index] if symbol is None else self.symbol_ids[symbol]
+        if symbol_id == self.event_symbol[index]:
+            return self.managers[symbol_id].store.price(self.event_row[index], sub_index)
+        self._sync()
+        row = self.last_row[symbol_id]
+        if row < 0:
+            return None
+        return self.managers[symbol_id].store.close[row]
+
+    def get_prices(self):
+        """Current price of every symbol, in self.symbols order (NaN before a symbol's first bar)."""
+        return np.array([np.nan if p is None else p for p in map(self.get_current_price, self.symbols)])
+
+    def get_current_time(self):
+        if self.current_index < len(self):
+            return pd.Timestamp(self.event_time[self.current_index])
+        return None
+
+    def _current_row(self, symbol):
+        if self.current_index >= len(self):
+            return None, -1
+        symbol_id = self._symbol_id(symbol)
+        self._sync()
+        return self.managers[symbol_id], self.last_row[symbol_id]
+
+    def get_current_data(self, symbol=None):
+        manager, row = self._current_row(symbol)
+        return manager.store.row(row) if row >= 0 else None
+
+    def get_value(self, column, default=None, symbol=None):
+        manager, row = self._current_row(symbol)
+        if row < 0 or column not in manager.store.columns:
+            return default
+        value = manager.store.columns[column][row]
+        return default if value != value else value  # NaN while an indicator warms up
+
+    def get_data_window(self, window_size=100, symbol=None):
+        manager, row = self._current_row(symbol)
+        start = max(row - window_size + 1, 0)
+        return manager.store.frame(start, row + 1)
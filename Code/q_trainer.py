@@ -0,0 +1,168 @@
+import argparse
+import os
+import time
+
+import numpy as np
+
+from DEFINEs import *
+from checkpoint import Checkpointer, load_checkpoint
+from data_manager import DataManager, require_single_symbol
+from ai_module import Action
+from features import DEFAULT_FEATURES, feature_set
+
+BUY, SELL, HOLD = Action.BUY.value, Action.SELL.value, Action.HOLD.value
+
+
+class QTrainer:
+    """Tabular Q-learning over many independent episodes at once.
+
+    Each environment replays its own random slice of the dataset, one decision per bar, with the
+    SimpleTrader rules: BUY/SELL open a position when flat and HOLD closes it at the bar's close.
+    The reward is the sign of the closed trade's profit. A stop loss is checked on the next bar's
+    sub-tick path (a stop-out is rewarded like a losing close). States come from a precomputed
+    FeatureSet: by default the three RSI buckets of SimpleTrader, or any richer feature spec
+    (one Q-table row per combined state). Every step is a handful of NumPy
+    operations over all environments; the Q-update averages the TD errors of the environments
+    that visited the same (state, action) cell.
+    """
+
+    def __init__(self, data_manager, n_envs=64, episode_length=500, rsi_threshold_low=30, rsi_threshold_high=70,
+                 learning_rate=0.1, discount_factor=0.9, epsilon=0.1, stop_loss_pips=20,
+                 spread=SPREAD, commission_per_lot=COMMISSION_PER_LOT, leverage=LEVERAGE, seed=None,
+                 features=None):
+        require_single_symbol(data_manager, "QTrainer")
+        store = data_manager.store
+        if len(store) < 3:
+            raise ValueError("Not enough bars to train on")
+        if features is None:
+            features = {'rsi': ('rsi14', 'bands', (rsi_threshold_low, rsi_threshold_high))}
+        self.feature_set = feature_set(data_manager, features)
+        self.states = self.feature_set.states
+        self.close = np.asarray(store.close)
+        self.low = store.path.min(axis=1)
+        self.high = store.path.max(axis=1)
+        self.n_envs = n_envs
+        self.episode_length = min(episode_length, len(store) - 2)
+        self.learning_rate = learning_rate
+        self.discount_factor = discount_factor
+        self.epsilon = epsilon
+        self.stop_distance = stop_loss_pips * 0.0001
+        self.spread = spread
+        self.commission_per_lot = commission_per_lot
+        self.leverage = leverage
+        self.rng = np.random.default_rng(seed)
+        self.q_table = np.zeros((self.feature_set.n_states, len(Action)))
+
+        self.index = np.zeros(n_envs, dtype=np.intp)
+        self.end = np.zeros(n_envs, dtype=np.intp)
+        self.side = np.zeros(n_envs)  # 1 long, -1 short, 0 flat
+        self.entry = np.zeros(n_envs)
+        self.transitions = 0
+        self.episodes = 0
+        self._reset(np.arange(n_envs))
+
+    def _reset(self, envs):
+        starts = self.rng.integers(0, len(self.close) - self.episode_length - 1, len(envs))
+        self.index[envs] = starts
+        self.end[envs] = starts + self.episode_length
+        self.side[envs] = 0
+        self.entry[envs] = 0
+
+    def _reward(self, side, entry, exit_price):
+        # Sign of Trade.get_profit; the position size scales the profit but never flips its sign
+        profit = (side * (exit_price - entry) - self.spread * 0.0001) * 10000 * self.leverage - self.commission_per_lot
+        return np.sign(profit)
+
+    def step(self):
+        """One decision in every environment, then one batched Q-update."""
+        q_table = self.q_table
+        n = self.n_envs
+        index = self.index
+        state = self.states[index]
+        greedy = np.argmax(q_table[state], axis=1)
+        actions = np.where(self.rng.random(n) < self.epsilon, self.rng.integers(0, len(Action), n), greedy)
+
+        side, entry, price = self.side, self.entry, self.close[index]
+        reward = np.zeros(n)
+        closing = (side != 0) & (actions == HOLD)
+        reward[closing] = self._reward(side[closing], entry[closing], price[closing])
+        side[closing] = 0
+        opening = (side == 0) & (actions != HOLD)
+        side[opening] = np.where(actions[opening] == BUY, 1.0, -1.0)
+        entry[opening] = price[opening]
+
+        next_index = index + 1
+        stop = entry - side * self.stop_distance
+        hit = ((side > 0) & (self.low[next_index] <= stop)) | ((side < 0) & (self.high[next_index] >= stop))
+        reward[hit] = self._reward(side[hit], entry[hit], stop[hit])
+        side[hit] = 0
+
+        done = next_index >= self.end
+        forced = done & (side != 0)
+        reward[forced] = self._reward(side[forced], entry[forced], self.close[next_index[forced]])
+
+        next_value = np.where(done, 0.0, q_table[self.states[next_index]].max(axis=1))
+        td_error = reward + self.discount_factor * next_value - q_table[state, actions]
+        cells = state * len(Action) + actions
+        total = np.bincount(cells, td_error, minlength=q_table.size)
+        visits = np.bincount(cells, minlength=q_table.size)
+        mean = np.divide(total, visits, out=np.zeros_like(total), where=visits > 0)
+        q_table += self.learning_rate * mean.reshape(q_table.shape)
+
+        self.index = next_index
+        self.transitions += n
+        finished = np.flatnonzero(done)
+        if len(finished):
+            self.episodes += len(finished)
+            self._reset(finished)
+        return reward
+
+    def train(self, steps, report_every=None):
+        """Run `steps` batched steps; returns the throughput in transitions per second."""
+        start = time.perf_counter()
+        first = self.transitions
+        for k in range(1, steps + 1):
+            self.step()
+            if report_every and k % report_every == 0:
+                elapsed = time.perf_counter() - start
+                print(f"step {k}: {self.transitions:,} transitions, {self.episodes:,} episodes, "
+                      f"{(self.transitions - first) / elapsed:,.0f} transitions/s")
+        elapsed = time.perf_counter() - start
+        return (self.transitions - first) / elapsed if elapsed > 0 else float('inf')
+
+    def save(self, path):
+        np.save(path, self.q_table)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Batched Q-learning of the RSI trader over many parallel episodes")
+    parser.add_argument("--csv", default=DATASET_FILE_PATH)
+    parser.add_argument("--envs", type=int, default=256)
+    parser.add_argument("--steps", type=int, default=5000)
+    parser.add_argument("--episode-length", type=int, default=500)
+    parser.add_argument("--epsilon", type=float, default=0.1)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--all-features", action="store_true", help="train on every feature in features.DEFAULT_FEATURES instead of RSI only")
+    parser.add_argument("--out", default="q_table.npy")
+    parser.add_argument("--checkpoint", default=None, help="resume from this checkpoint if it exists and keep it updated")
+    parser.add_argument("--checkpoint-every", type=float, default=30, help="seconds between background checkpoints")
+    args = parser.parse_args()
+
+    trainer = QTrainer(DataManager(args.csv), n_envs=args.envs, episode_length=args.episode_length,
+                       epsilon=args.epsilon, seed=args.seed, features=DEFAULT_FEATURES if args.all_features else None)
+    agents = {'trainer': trainer}
+    if args.checkpoint and os.path.exists(args.checkpoint):
+        load_checkpoint(args.checkpoint, agents=agents)
+        print(f"Resumed the Q-table from {args.checkpoint}")
+    if args.checkpoint:
+        with Checkpointer(args.checkpoint, args.checkpoint_every, agents=agents):
+            rate = trainer.train(args.steps, report_every=max(args.steps // 10, 1))
+    else:
+        rate = trainer.train(args.steps, report_every=max(args.steps // 10, 1))
+    trainer.save(args.out)
+    print(f"Trained on {trainer.transitions:,} transitions ({trainer.episodes:,} episodes) at {rate:,.0f} transitions/s")
+    print(f"Q-table saved to {args.out}:\n{trainer.q_table}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,141 @@
+import threading
+import time
+from collections import namedtuple
+
+from data_manager import SUB_TICKS, require_single_symbol
+
+# Everything the dashboard paints, taken at one instant under the simulator lock. Bars never change,
+# so `position` is enough to locate the chart window; closed_log is append-only, so
+# closed_log[:closed_count] are the closed trades at that instant.
+Snapshot = namedtuple('Snapshot', [
+    'sequence', 'position', 'time', 'price', 'balance', 'open_trades', 'pnl', 'closed_log', 'closed_count',
+    'playing', 'ticks_per_second'])
+
+
+class ReplayEngine:
+    """Single producer for the dashboard: plays the replay and publishes the latest Snapshot.
+
+    A background thread advances the cursor at `rate` sub-ticks per second, checking stops after
+    every tick, and after each batch replaces `latest` with a new immutable Snapshot. Readers just
+    take `latest` whenever they paint, so the replay speed is independent of the paint rate and
+    stale states are never queued. Cursor moves from elsewhere (buttons, the API) wake the thread,
+    and trades opened or closed elsewhere show up within `idle_interval` seconds. A snapshot is
+    only published when something it holds has changed.
+    """
+
+    def __init__(self, simulator, rate=2.0, idle_interval=1 / 30, max_catch_up=0.1):
+        require_single_symbol(simulator.data_manager, "ReplayEngine")
+        self.simulator = simulator
+        self.data_manager = simulator.data_manager
+        self.rate = rate
+        self.idle_interval = idle_interval
+        self.max_catch_up = max_catch_up  # seconds of ticks replayed at once after a stall; older ones are dropped
+        self.playing = False
+        self.latest = None
+        self.ticks = 0
+        self.ticks_per_second = 0.0
+        self._sequence = 0
+        self._state = None
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self._publish()
+        self.data_manager.add_listener(self._cursor_moved)
+
+    def start(self):
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="replay", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.data_manager.remove_listener(self._cursor_moved)
+
+    def play(self, rate=None):
+        if rate is not None:
+            self.rate = rate
+        self.playing = True
+        self._wake.set()
+
+    def pause(self):
+        self.playing = False
+        self._wake.set()
+
+    def set_rate(self, rate):
+        """Sub-ticks per second while playing."""
+        self.rate = rate
+        self._wake.set()
+
+    def refresh(self):
+        """Publish a new snapshot now, e.g. after a trade was opened or closed."""
+        self._wake.set()
+
+    def _cursor_moved(self, data_manager):
+        if threading.current_thread() is not self._thread:
+            self._wake.set()
+
+    def _publish(self):
+        simulator = self.simulator
+        with simulator.lock:
+            position = self.data_manager.position
+            index, sub_index = divmod(position, SUB_TICKS)
+            store = self.data_manager.store
+            price = store.price(index, sub_index) if index < len(store) else None
+            state = (position, simulator.trade_counter, len(simulator.book.closed), simulator.account_balance,
+                     self.playing, self.ticks_per_second)
+            if self.latest is not None and state == self._state:
+                return  # nothing changed since the last snapshot
+            self._state = state
+            open_trades, pnl = simulator.get_unrealized_pnl(price)
+            pnl.flags.writeable = False
+            closed_log = simulator.book.closed_manual
+            self._sequence += 1
+            self.latest = Snapshot(self._sequence, position, store.time(index) if index < len(store) else None,
+                                   price, simulator.account_balance, tuple(open_trades), pnl, closed_log,
+                                   len(closed_log), self.playing, self.ticks_per_second)
+
+    def _advance(self, count):
+        data_manager = self.data_manager
+        end = len(data_manager) * SUB_TICKS - 1
+        for _ in range(count):
+            if data_manager.position >= end:
+                self.playing = False
+                break
+            data_manager.step_forward()
+            self.simulator.update_trades()
+            self.ticks += 1
+
+    def _run(self):
+        last_position = None
+        clock = time.perf_counter()
+        due = 0.0
+        rate_start, rate_ticks = clock, self.ticks
+        while not self._stop.is_set():
+            now = time.perf_counter()
+            if self.playing:
+                due = min(due + (now - clock) * self.rate, max(self.rate * self.max_catch_up, 1.0))
+                count = int(due)
+                due -= count
+                self._advance(count)
+            else:
+                due = 0.0
+            clock = now
+            if now - rate_start >= 0.5:
+                self.ticks_per_second = (self.ticks - rate_ticks) / (now - rate_start)
+                rate_start, rate_ticks = now, self.ticks
+            if self.data_manager.position != last_position:
+                if not self.playing:  # moved by hand: check stops once at the new price
+                    self.simulator.update_trades()
+                last_position = self.data_manager.position
+            self._publish()
+
+            timeout = self.idle_interval
+            if self.playing:
+                timeout = min(timeout, max((1.0 - due) / self.rate, 0.0005))
+            self._wake.wait(timeout)
+            self._wake.clear()
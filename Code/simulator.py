@@ -1,14 +1,22 @@
 import logging
 import os
+import threading
 from datetime import datetime
 
+import numpy as np
+import pandas as pd
+
+from journal import TRADE_LOGGER, setup_logging
+from stats import TradeStats
+
 log_dir = "../Log"
 os.makedirs(log_dir, exist_ok=True)
-logging.basicConfig(filename=os.path.join(log_dir, 'trading_log.log'), level=logging.INFO, 
-                    format='%(asctime)s - %(levelname)s - %(message)s')
+setup_logging(os.path.join(log_dir, 'trading_log.log'))
+# Lazy %-style arguments: a message is only formatted (on the log writer thread) if it is emitted
+logger = logging.getLogger(TRADE_LOGGER)
 
 class Trade:
-    def __init__(self, trade_id, trade_type, entry_price, size, open_time, spread, commission_per_lot, stop_loss_pips, leverage, is_ai_trade=False):
+    def __init__(self, trade_id, trade_type, entry_price, size, open_time, spread, commission_per_lot, stop_loss_pips, leverage, is_ai_trade=False, symbol=None):
         self.trade_id = trade_id
         self.trade_type = trade_type
         self.entry_price = entry_price
@@ -21,6 +29,7 @@ class Trade:
         self.stop_loss_pips = stop_loss_pips
         self.leverage = leverage
         self.is_ai_trade = is_ai_trade
+        self.symbol = symbol
 
     def get_profit(self, current_price):
         if self.trade_type == "buy":
@@ -34,28 +43,278 @@ class Trade:
         self.exit_price = exit_price
         self.close_time = close_time
         profit = self.get_profit(exit_price)
-        logging.info(f"Trade {self.trade_id} closed: Type={self.trade_type}, Profit={profit:.4f}, Leverage={self.leverage}, AI={self.is_ai_trade}")
+        logger.info("Trade %s closed: Type=%s, Profit=%.4f, Leverage=%s, AI=%s", self.trade_id, self.trade_type, profit,
+                    self.leverage, self.is_ai_trade)
         return profit
 
+class OpenPositions:
+    """Open trades as parallel NumPy arrays so stops and P&L are evaluated in one pass per tick."""
+    FIELDS = ('side', 'entry', 'size', 'leverage', 'stop', 'spread', 'commission', 'symbol_id')
+
+    def __init__(self, capacity=64):
+        self.count = 0
+        self.trades = []  # slot -> Trade
+        self.slots = {}  # trade_id -> slot
+        self.symbols = [None]  # symbol_id -> symbol, None for single-instrument trades
+        self.symbol_ids = {None: 0}
+        for name in self.FIELDS:
+            setattr(self, name, np.zeros(capacity, dtype=np.intp if name == 'symbol_id' else np.float64))
+
+    def __len__(self):
+        return self.count
+
+    def _grow(self):
+        for name in self.FIELDS:
+            values = getattr(self, name)
+            grown = np.zeros(len(values) * 2, dtype=values.dtype)
+            grown[:self.count] = values[:self.count]
+            setattr(self, name, grown)
+
+    def add(self, trade):
+        if self.count == len(self.side):
+            self._grow()
+        slot = self.count
+        side = 1.0 if trade.trade_type == "buy" else -1.0
+        self.side[slot] = side
+        self.entry[slot] = trade.entry_price
+        self.size[slot] = trade.size
+        self.leverage[slot] = trade.leverage
+        self.stop[slot] = trade.entry_price - side * trade.stop_loss_pips * 0.0001
+        self.spread[slot] = trade.spread
+        self.commission[slot] = trade.commission_per_lot
+        if trade.symbol not in self.symbol_ids:
+            self.symbol_ids[trade.symbol] = len(self.symbols)
+            self.symbols.append(trade.symbol)
+        self.symbol_id[slot] = self.symbol_ids[trade.symbol]
+        self.trades.append(trade)
+        self.slots[trade.trade_id] = slot
+        self.count += 1
+
+    def remove(self, trade):
+        # Swap the last position into the freed slot so removal stays O(1)
+        slot = self.slots.pop(trade.trade_id)
+        last = self.count - 1
+        if slot != last:
+            for name in self.FIELDS:
+                values = getattr(self, name)
+                values[slot] = values[last]
+            moved = self.trades[last]
+            self.trades[slot] = moved
+            self.slots[moved.trade_id] = slot
+        self.trades.pop()
+        self.count = last
+
+    def stop_price(self, trade):
+        return self.stop[self.slots[trade.trade_id]]
+
+    def current_prices(self, price_of):
+        """Price for every open slot from price_of(symbol); a plain scalar while no trade carries a symbol."""
+        if len(self.symbols) == 1:
+            return price_of(None)
+        table = np.array([np.nan if price is None else price for price in map(price_of, self.symbols)])
+        return table[self.symbol_id[:self.count]]
+
+    def stop_hits(self, current_price):
+        """Trades whose stop loss is reached at current_price."""
+        n = self.count
+        hit = self.side[:n] * (current_price - self.stop[:n]) <= 0
+        return [self.trades[slot] for slot in np.flatnonzero(hit)]
+
+    def profits(self, current_price):
+        """Unrealized P&L of every open position (slot order), same formula as Trade.get_profit."""
+        n = self.count
+        pips = self.side[:n] * (current_price - self.entry[:n]) - self.spread[:n] * 0.0001
+        return pips * self.size[:n] * 10000 * self.leverage[:n] - self.commission[:n] * self.size[:n]
+
+    def margin(self):
+        """Margin held by the open positions: their notional at the entry price divided by the leverage."""
+        # The notional is the size * 10000 * leverage units the P&L formula above trades
+        n = self.count
+        return float(np.sum(self.size[:n] * 10000 * self.entry[:n]))
+
+
+class TradeBook:
+    """Trades indexed by id, with the open set kept apart from an append-only log of closed trades."""
+    FLOAT_FIELDS = ('entry_price', 'size', 'spread', 'commission_per_lot', 'stop_loss_pips', 'leverage')
+
+    def __init__(self):
+        self.by_id = {}
+        self.open = {}  # trade_id -> Trade, in opening order
+        self.closed = []  # in closing order
+        self.closed_manual = []  # closed trades that were not opened by the AI
+        self.positions = OpenPositions()
+        self._closed_arrays = None  # columnar copy of `closed`, grown by to_arrays()
+
+    def __len__(self):
+        return len(self.by_id)
+
+    def add(self, trade):
+        self.by_id[trade.trade_id] = trade
+        if trade.close_time is None:
+            self.open[trade.trade_id] = trade
+            self.positions.add(trade)
+        else:
+            self._log_closed(trade)
+
+    def get(self, trade_id):
+        return self.by_id.get(trade_id)
+
+    def get_open(self, trade_id):
+        return self.open.get(trade_id)
+
+    def mark_closed(self, trade):
+        del self.open[trade.trade_id]
+        self.positions.remove(trade)
+        self._log_closed(trade)
+
+    def _log_closed(self, trade):
+        self.closed.append(trade)
+        if not trade.is_ai_trade:
+            self.closed_manual.append(trade)
+
+    def all(self):
+        return list(self.by_id.values())
+
+    @classmethod
+    def trade_arrays(cls, trades):
+        arrays = {name: np.array([getattr(t, name) for t in trades], dtype=np.float64) for name in cls.FLOAT_FIELDS}
+        arrays['trade_id'] = np.array([t.trade_id for t in trades], dtype=np.int64)
+        arrays['is_sell'] = np.array([t.trade_type == "sell" for t in trades], dtype=bool)
+        arrays['is_ai_trade'] = np.array([t.is_ai_trade for t in trades], dtype=bool)
+        arrays['symbol'] = np.array(["" if t.symbol is None else t.symbol for t in trades], dtype=str)
+        arrays['exit_price'] = np.array([np.nan if t.exit_price is None else t.exit_price for t in trades], dtype=np.float64)
+        arrays['open_time'] = np.array([t.open_time for t in trades], dtype='datetime64[ns]')
+        arrays['close_time'] = np.array([t.close_time for t in trades], dtype='datetime64[ns]')
+        return arrays
+
+    def to_arrays(self):
+        """Every trade as columnar NumPy arrays: the closed ones in closing order, then the open ones.
+
+        Closed trades never change, so their arrays are cached and only trades closed since the
+        previous call are converted; a snapshot costs O(new + open trades), not O(history).
+        """
+        cached = self._closed_arrays
+        done = len(cached['trade_id']) if cached else 0
+        if cached is None or done < len(self.closed):
+            new = self.trade_arrays(self.closed[done:])
+            self._closed_arrays = cached = new if cached is None else {
+                name: np.concatenate((cached[name], new[name])) for name in new}
+        opened = self.trade_arrays(list(self.open.values()))
+        arrays = {name: np.concatenate((cached[name], opened[name])) for name in cached}
+        arrays['closed_count'] = np.int64(len(self.closed))
+        return arrays
+
+    @classmethod
+    def from_arrays(cls, arrays):
+        book = cls()
+        columns = {name: arrays[name].tolist() for name in cls.FLOAT_FIELDS + ('trade_id', 'is_sell', 'is_ai_trade', 'symbol', 'exit_price')}
+        open_times = pd.DatetimeIndex(arrays['open_time']).tolist()
+        close_times = pd.DatetimeIndex(arrays['close_time']).tolist()
+        closed_count = int(arrays['closed_count'])
+        trades = []
+        for i, trade_id in enumerate(columns['trade_id']):
+            trade = Trade(trade_id, "sell" if columns['is_sell'][i] else "buy", columns['entry_price'][i],
+                          columns['size'][i], open_times[i], columns['spread'][i], columns['commission_per_lot'][i],
+                          columns['stop_loss_pips'][i], columns['leverage'][i], columns['is_ai_trade'][i],
+                          columns['symbol'][i] or None)
+            if i < closed_count:
+                trade.close_time = close_times[i]
+                trade.exit_price = columns['exit_price'][i]
+            trades.append(trade)
+        # Trade ids grow in opening order, which is the order the book lists trades in
+        for trade in sorted(trades, key=lambda t: t.trade_id):
+            book.by_id[trade.trade_id] = trade
+            if trade.close_time is None:
+                book.open[trade.trade_id] = trade
+                book.positions.add(trade)
+        for trade in trades[:closed_count]:
+            book._log_closed(trade)
+        book._closed_arrays = {name: arrays[name][:closed_count] for name in cls.trade_arrays([])}
+        return book
+
+
 class Simulator:
-    def __init__(self, data_manager, initial_balance=1000, risk_percentage=0.10, spread=2, commission_per_lot=7, leverage=1):
+    SETTINGS = ('risk_percentage', 'spread', 'commission_per_lot', 'leverage')
+
+    def __init__(self, data_manager, initial_balance=1000, risk_percentage=0.10, spread=2, commission_per_lot=7, leverage=1,
+                 journal=None, recorder=None):
         self.data_manager = data_manager
-        self.trades = []
+        self.journal = journal  # optional journal.TradeJournal receiving every trade event
+        self.recorder = recorder  # optional equity.EquityRecorder receiving the account state every tick
+        self.book = TradeBook()
         self.trade_counter = 0
         self.account_balance = initial_balance
         self.risk_percentage = risk_percentage
         self.spread = spread
         self.commission_per_lot = commission_per_lot
         self.leverage = leverage
-        logging.info(f"Simulator initialized with balance={initial_balance}, risk={risk_percentage*100}%, leverage={leverage}")
+        self.lock = threading.RLock()
+        # Counts and profits cover the trades get_closed_trades lists (manual ones); equity covers the account
+        self.stats = TradeStats()
+        self._marked_position = None
+        self._tick_listeners = []
+        logger.info("Simulator initialized with balance=%s, risk=%s%%, leverage=%s", initial_balance, risk_percentage * 100, leverage)
+
+    def add_tick_listener(self, callback):
+        """Call callback(simulator) once per new cursor position processed by update_trades(), after
+        that tick's stop-outs, under the simulator lock (so keep it short)."""
+        self._tick_listeners.append(callback)
+
+    def remove_tick_listener(self, callback):
+        if callback in self._tick_listeners:
+            self._tick_listeners.remove(callback)
+
+    @property
+    def trades(self):
+        return self.book.all()
+
+    def snapshot(self):
+        """Balance, settings, trades and the data cursor as NumPy arrays (saved by checkpoint.py)."""
+        with self.lock:
+            state = self.book.to_arrays()
+            state['balance'] = np.float64(self.account_balance)
+            state['trade_counter'] = np.int64(self.trade_counter)
+            for name in self.SETTINGS:
+                state['setting_' + name] = np.asarray(getattr(self, name))
+            for name, value in self.stats.state().items():
+                state['stats_' + name] = np.asarray(value)
+            state['position'] = np.int64(self.data_manager.position)
+            state['bars'] = np.int64(len(self.data_manager))
+        return state
+
+    def restore(self, state):
+        """Inverse of snapshot(); the data manager must hold the same dataset."""
+        if int(state['bars']) != len(self.data_manager):
+            raise ValueError(f"Snapshot was taken on {int(state['bars'])} bars, the data has {len(self.data_manager)}")
+        book = TradeBook.from_arrays(state)
+        with self.lock:
+            self.book = book
+            self.account_balance = float(state['balance'])
+            self.trade_counter = int(state['trade_counter'])
+            for name in self.SETTINGS:
+                setattr(self, name, state['setting_' + name].item())
+            self.stats.reset()
+            if 'stats_trades' in state:
+                self.stats.load({name[len('stats_'):]: value.item() for name, value in state.items() if name.startswith('stats_')})
+            else:  # checkpoint written before the statistics existed: the trade totals can be rebuilt
+                for trade in book.closed_manual:
+                    self.stats.add_trade(trade.get_profit(trade.exit_price))
+            self._marked_position = None
+            self.data_manager.seek(int(state['position']))
+        logger.info("Simulator restored: balance=%s, trades=%s, position=%s", self.account_balance, len(book), int(state['position']))
 
     def set_balance(self, new_balance):
-        self.account_balance = new_balance
-        logging.info(f"Initial balance updated to {new_balance}")
+        with self.lock:
+            self.account_balance = new_balance
+            self.stats.reset_equity()
+            if self.journal is not None:
+                self.journal.record('balance', None, None, balance=new_balance)
+        logger.info("Initial balance updated to %s", new_balance)
 
     def set_leverage(self, leverage):
-        self.leverage = leverage
-        logging.info(f"Leverage set to {leverage}")
+        with self.lock:
+            self.leverage = leverage
+        logger.info("Leverage set to %s", leverage)
 
     def calculate_position_size(self, stop_loss_pips):
         pip_value = 10
@@ -63,65 +322,238 @@ class Simulator:
         position_size = (risk_amount / (stop_loss_pips * pip_value)) * self.leverage
         return round(position_size, 2)
 
-    def open_trade(self, trade_type, stop_loss_pips=20, is_ai_trade=False):
-        current_data = self.data_manager.get_current_data()
-        current_price = self.data_manager.get_current_price()
-        if current_data is None or current_price is None:
+    def _price_of(self, symbol):
+        if symbol is None:
+            return self.data_manager.get_current_price()
+        return self.data_manager.get_current_price(symbol)
+
+    def _trade_symbol(self, symbol):
+        # On multi-symbol data a trade without a symbol belongs to the instrument being replayed now;
+        # left as None it would be priced by whichever symbol's bar comes up on later ticks
+        if symbol is None:
+            return getattr(self.data_manager, 'current_symbol', None)
+        return symbol
+
+    def open_trade(self, trade_type, stop_loss_pips=20, is_ai_trade=False, symbol=None):
+        symbol = self._trade_symbol(symbol)
+        current_time = self.data_manager.get_current_time()
+        current_price = self._price_of(symbol)
+        if current_time is None or current_price is None:
             return None
-        
+        with self.lock:
+            return self._open_trade(trade_type, stop_loss_pips, is_ai_trade, symbol, current_price, current_time)
+
+    def _open_trade(self, trade_type, stop_loss_pips, is_ai_trade, symbol, current_price, current_time):
         self.trade_counter += 1
         size = self.calculate_position_size(stop_loss_pips)
-        trade = Trade(self.trade_counter, trade_type, current_price, size, current_data['date_time'], 
-                      self.spread, self.commission_per_lot, stop_loss_pips, self.leverage, is_ai_trade)
-        self.trades.append(trade)
-        logging.info(f"Trade {self.trade_counter} opened: Type={trade_type}, Size={size}, Entry={current_price}, Leverage={self.leverage}, AI={is_ai_trade}")
+        trade = Trade(self.trade_counter, trade_type, current_price, size, current_time, 
+                      self.spread, self.commission_per_lot, stop_loss_pips, self.leverage, is_ai_trade, symbol)
+        self.book.add(trade)
+        if self.journal is not None:
+            self.journal.record('open', trade, current_price, balance=self.account_balance)
+        logger.info("Trade %s opened: Type=%s, Size=%s, Entry=%s, Leverage=%s, AI=%s", self.trade_counter, trade_type, size,
+                    current_price, self.leverage, is_ai_trade)
         return self.trade_counter
 
     def close_trade(self, trade_id):
-        for trade in self.trades:
-            if trade.trade_id == trade_id and trade.close_time is None:
-                current_data = self.data_manager.get_current_data()
-                current_price = self.data_manager.get_current_price()
-                if current_data is None or current_price is None:
-                    return None
-                profit = trade.close(current_price, current_data['date_time'])
-                self.account_balance += profit
-                logging.info(f"Balance updated to {self.account_balance:.2f} after closing trade {trade_id}")
-                return profit
+        with self.lock:
+            trade = self.book.get_open(trade_id)
+            if trade is None:
+                return None
+            current_time = self.data_manager.get_current_time()
+            current_price = self._price_of(trade.symbol)
+            if current_time is None or current_price is None:
+                return None
+            return self._close_trade(trade, current_price, current_time)
+
+    def _close_trade(self, trade, current_price, current_time):
+        profit = trade.close(current_price, current_time)
+        self.book.mark_closed(trade)
+        self.account_balance += profit
+        if not trade.is_ai_trade:
+            self.stats.add_trade(profit)
+        if self.journal is not None:
+            self.journal.record('close', trade, current_price, profit, self.account_balance)
+        logger.info("Balance updated to %.2f after closing trade %s", self.account_balance, trade.trade_id)
+        return profit
+
+    def find_open_trades(self, trade_type=None, is_ai_trade=None, symbol=None):
+        with self.lock:
+            return [trade for trade in self.book.open.values()
+                    if (trade_type is None or trade.trade_type == trade_type)
+                    and (is_ai_trade is None or trade.is_ai_trade == is_ai_trade)
+                    and (symbol is None or trade.symbol == symbol)]
+
+    def close_all(self, trade_type=None, is_ai_trade=None, symbol=None):
+        """Close every open trade matching the filter at the current price. Returns {trade_id: profit}."""
+        return self.execute_orders([{"action": "close_all", "trade_type": trade_type,
+                                     "is_ai_trade": is_ai_trade, "symbol": symbol}])[0].get("profits", {})
+
+    @staticmethod
+    def validate_order(order):
+        if not isinstance(order, dict):
+            return "Order must be an object"
+        action = order.get("action")
+        if action == "open":
+            if order.get("trade_type") not in ("buy", "sell"):
+                return "Invalid trade type"
+            stop_loss_pips = order.get("stop_loss_pips", 20)
+            if isinstance(stop_loss_pips, bool) or not isinstance(stop_loss_pips, (int, float)) or stop_loss_pips <= 0:
+                return "Invalid stop loss"
+            if order.get("symbol") is not None and not isinstance(order.get("symbol"), str):
+                return "Invalid symbol"
+        elif action == "close":
+            if isinstance(order.get("trade_id"), bool) or not isinstance(order.get("trade_id"), int):
+                return "Invalid trade ID"
+        elif action == "close_all":
+            if order.get("trade_type") not in (None, "buy", "sell"):
+                return "Invalid trade type"
+            if order.get("is_ai_trade") is not None and not isinstance(order.get("is_ai_trade"), bool):
+                return "Invalid filter"
+            if order.get("symbol") is not None and not isinstance(order.get("symbol"), str):
+                return "Invalid filter"
+        else:
+            return "Invalid action"
         return None
 
+    def execute_orders(self, orders):
+        """Apply a batch of open/close/close_all orders atomically, all at the same current price.
+
+        Orders are dicts: {"action": "open", "trade_type", "stop_loss_pips", "is_ai_trade", "symbol"},
+        {"action": "close", "trade_id"} or {"action": "close_all", "trade_type", "is_ai_trade", "symbol"}.
+        Returns one result dict per order.
+        """
+        with self.lock:
+            current_time = self.data_manager.get_current_time()
+            prices = {}
+
+            def price_of(symbol):
+                if symbol not in prices:
+                    prices[symbol] = self._price_of(symbol)
+                return prices[symbol]
+
+            results = []
+            for order in orders:
+                action = order["action"]
+                if action == "open":
+                    symbol = self._trade_symbol(order.get("symbol"))
+                    price = price_of(symbol) if current_time is not None else None
+                    if price is None:
+                        results.append({"ok": False, "error": "Unable to open trade"})
+                        continue
+                    trade_id = self._open_trade(order["trade_type"], order.get("stop_loss_pips", 20),
+                                                order.get("is_ai_trade", False), symbol, price, current_time)
+                    results.append({"ok": True, "trade_id": trade_id})
+                elif action == "close":
+                    trade = self.book.get_open(order["trade_id"])
+                    price = price_of(trade.symbol) if trade is not None and current_time is not None else None
+                    if price is None:
+                        results.append({"ok": False, "error": "Trade not found or already closed"})
+                        continue
+                    results.append({"ok": True, "profit": self._close_trade(trade, price, current_time)})
+                else:
+                    profits = {}
+                    if current_time is not None:
+                        for trade in self.find_open_trades(order.get("trade_type"), order.get("is_ai_trade"), order.get("symbol")):
+                            price = price_of(trade.symbol)
+                            if price is not None:
+                                profits[trade.trade_id] = self._close_trade(trade, price, current_time)
+                    results.append({"ok": True, "profits": profits})
+            return results
+
     def update_trades(self):
-        current_price = self.data_manager.get_current_price()
-        if current_price is None:
-            return
-        for trade in self.trades:
-            if trade.close_time is None:
-                stop_price = trade.entry_price - trade.stop_loss_pips * 0.0001 if trade.trade_type == "buy" else trade.entry_price + trade.stop_loss_pips * 0.0001
-                if (trade.trade_type == "buy" and current_price <= stop_price) or (trade.trade_type == "sell" and current_price >= stop_price):
-                    profit = trade.close(stop_price, self.data_manager.get_current_data()['date_time'])
+        """Per-tick bookkeeping: close the positions whose stop loss is hit, then mark the account equity."""
+        with self.lock:
+            positions = self.book.positions
+            current_price = positions.current_prices(self._price_of)
+            if current_price is None:
+                return
+            hits = positions.stop_hits(current_price)
+            if hits:
+                current_time = self.data_manager.get_current_time()
+                for trade in hits:
+                    stop_price = float(positions.stop_price(trade))
+                    profit = trade.close(stop_price, current_time)
+                    self.book.mark_closed(trade)
                     self.account_balance += profit
-                    logging.info(f"Trade {trade.trade_id} hit stop loss. Balance updated to {self.account_balance:.2f}")
+                    if not trade.is_ai_trade:
+                        self.stats.add_trade(profit)
+                    if self.journal is not None:
+                        self.journal.record('stop', trade, stop_price, profit, self.account_balance)
+                    logger.info("Trade %s hit stop loss. Balance updated to %.2f", trade.trade_id, self.account_balance)
+                current_price = positions.current_prices(self._price_of)
+            if self._mark_equity(current_price):
+                for callback in self._tick_listeners:
+                    callback(self)
+
+    def _mark_equity(self, current_price):
+        # Once per cursor position, however many times the tick is processed
+        position = self.data_manager.position
+        if position == self._marked_position:
+            return False
+        current_time = self.data_manager.get_current_time()
+        if current_time is None:
+            return False
+        self._marked_position = position
+        positions = self.book.positions
+        unrealized = float(np.nansum(positions.profits(current_price))) if len(positions) else 0.0
+        equity = self.account_balance + unrealized
+        self.stats.mark(current_time.value, equity, len(positions) > 0)
+        if self.recorder is not None:
+            self.recorder.record(current_time.value, self.account_balance, equity,
+                                 positions.margin() if len(positions) else 0.0, len(positions))
+        return True
 
     def get_open_trades(self):
-        return [trade for trade in self.trades if trade.close_time is None]
+        with self.lock:
+            return list(self.book.open.values())
+
+    def get_unrealized_pnl(self, current_price=None):
+        """Open trades and their unrealized P&L at current_price, computed in one vectorized pass."""
+        with self.lock:
+            positions = self.book.positions
+            if current_price is None:
+                current_price = positions.current_prices(self._price_of)
+            trades = list(positions.trades)
+            if current_price is None:
+                return trades, np.zeros(len(trades))
+            return trades, positions.profits(current_price)
+
+    def get_closed_trades(self, since=0):
+        """Closed manual trades in closing order; `since` skips the first ones (e.g. those already shown).
+
+        Before the TradeBook this listed trades in opening order. Closing order keeps the list
+        append-only, which is what lets `since` work. Sort by trade_id for opening order; the trade
+        history list does so by default. Totals (generate_report, get_stats) do not depend on the order.
+        """
+        with self.lock:
+            return self.book.closed_manual[since:]
 
-    def get_closed_trades(self):
-        return [trade for trade in self.trades if trade.close_time is not None and not trade.is_ai_trade]
+    def get_stats(self):
+        """Performance statistics of the session so far (see stats.TradeStats), read in O(1)."""
+        with self.lock:
+            summary = self.stats.summary()
+            summary['balance'] = self.account_balance
+        return summary
 
     def generate_report(self):
-        closed_trades = self.get_closed_trades()
-        total_profit = sum(trade.get_profit(trade.exit_price) for trade in closed_trades)
-        winning_trades = len([t for t in closed_trades if t.get_profit(t.exit_price) > 0])
-        losing_trades = len(closed_trades) - winning_trades
+        summary = self.get_stats()
         report = (
             f"Trading Report:\n"
-            f"Account Balance: {self.account_balance:.2f}\n"
-            f"Total Profit: {total_profit:.2f}\n"
-            f"Total Trades: {len(closed_trades)}\n"
-            f"Winning Trades: {winning_trades}\n"
-            f"Losing Trades: {losing_trades}\n"
-            f"Win Rate: {winning_trades / len(closed_trades) * 100 if closed_trades else 0:.2f}%\n"
+            f"Account Balance: {summary['balance']:.2f}\n"
+            f"Total Profit: {summary['total_profit']:.2f}\n"
+            f"Total Trades: {summary['trades']}\n"
+            f"Winning Trades: {summary['wins']}\n"
+            f"Losing Trades: {summary['losses']}\n"
+            f"Win Rate: {summary['win_rate'] * 100:.2f}%\n"
+            f"Profit Factor: {summary['profit_factor']:.2f}\n"
+            f"Average Win: {summary['average_win']:.2f}\n"
+            f"Average Loss: {summary['average_loss']:.2f}\n"
+            f"Max Drawdown: {summary['max_drawdown'] * 100:.2f}%\n"
+            f"Sharpe Ratio: {summary['sharpe']:.2f}\n"
+            f"Sortino Ratio: {summary['sortino']:.2f}\n"
+            f"Exposure: {summary['exposure'] * 100:.2f}%\n"
             f"Leverage: {self.leverage}"
         )
-        logging.info(report)
-        return report
\ No newline at end of file
+        logger.info(report)
+        return report
@@ -0,0 +1,176 @@
+import math
+
+import numpy as np
+
+SECONDS_PER_YEAR = 365.25 * 24 * 3600
+RUIN_RATIO = -math.inf  # Sharpe and Sortino of an account whose equity reached zero
+
+
+class TradeStats:
+    """Running performance statistics, updated in O(1) per closed trade and per equity mark.
+
+    add_trade() takes the profit of each closed trade. mark() takes the account equity (balance plus
+    unrealized P&L) at a point in simulated time, and extend() folds in a whole equity series at once
+    (same result as marking it point by point). The returns between marks feed running moments
+    (Welford) for the Sharpe and Sortino ratios, annualized by the simulated time covered; the time
+    spent with open positions gives the exposure. summary() reads everything without touching the
+    trade history.
+
+    Equity at or below zero is ruin: no further returns are taken (they would be relative to a
+    near-zero or negative base), the ratios become RUIN_RATIO and the drawdown stays at 100%.
+    Marks earlier than the latest one (the replay was rewound) are ignored until simulated time
+    passes it again, so a rewind never undoes the statistics gathered so far.
+    """
+    TRADE_FIELDS = ('trades', 'wins', 'gross_profit', 'gross_loss', 'largest_win', 'largest_loss')
+    EQUITY_FIELDS = ('marks', 'first_time', 'last_time', 'last_equity', 'last_exposed', 'peak', 'max_drawdown',
+                     'returns', 'mean', 'm2', 'downside', 'exposed_ns', 'ruined')
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.trades = 0
+        self.wins = 0
+        self.gross_profit = 0.0
+        self.gross_loss = 0.0  # positive sum of the losing trades
+        self.largest_win = 0.0
+        self.largest_loss = 0.0
+        self.reset_equity()
+
+    def reset_equity(self):
+        """Start the equity series afresh, e.g. after the balance was set by hand."""
+        self.marks = 0
+        self.first_time = self.last_time = 0  # nanoseconds
+        self.last_equity = math.nan
+        self.last_exposed = False
+        self.peak = -math.inf
+        self.max_drawdown = 0.0
+        self.returns = 0
+        self.mean = 0.0
+        self.m2 = 0.0  # sum of squared deviations of the returns from their mean
+        self.downside = 0.0  # sum of squared negative returns
+        self.exposed_ns = 0
+        self.ruined = False
+
+    def add_trade(self, profit):
+        self.trades += 1
+        if profit > 0:
+            self.wins += 1
+            self.gross_profit += profit
+            self.largest_win = max(self.largest_win, profit)
+        else:
+            self.gross_loss -= profit
+            self.largest_loss = min(self.largest_loss, profit)
+
+    def mark(self, time_ns, equity, exposed):
+        """Equity at simulated time `time_ns`; `exposed` is whether positions are open from now on."""
+        if self.marks and time_ns < self.last_time:
+            return
+        if self.marks:
+            if self.last_exposed:
+                self.exposed_ns += time_ns - self.last_time
+            if not self.ruined:
+                r = equity / self.last_equity - 1
+                self.returns += 1
+                delta = r - self.mean
+                self.mean += delta / self.returns
+                self.m2 += delta * (r - self.mean)
+                if r < 0:
+                    self.downside += r * r
+        else:
+            self.first_time = time_ns
+        if equity <= 0:
+            self.ruined = True
+        if equity > self.peak:
+            self.peak = equity
+        elif self.peak > 0:
+            self.max_drawdown = min(max(self.max_drawdown, (self.peak - equity) / self.peak), 1.0)
+        self.marks += 1
+        self.last_time = time_ns
+        self.last_equity = equity
+        self.last_exposed = exposed
+
+    def extend(self, times_ns, equity, exposed):
+        """mark() every point of a series in one vectorized pass."""
+        times_ns = np.asarray(times_ns, dtype=np.int64)
+        equity = np.asarray(equity, dtype=np.float64)
+        exposed = np.asarray(exposed, dtype=bool)
+        # Same as mark(): drop the points earlier than a point (or mark) before them
+        floor = np.maximum(times_ns, self.last_time) if self.marks else times_ns
+        forward = times_ns == np.maximum.accumulate(floor)
+        if not forward.all():
+            times_ns, equity, exposed = times_ns[forward], equity[forward], exposed[forward]
+        if len(equity) == 0:
+            return
+        if self.marks:
+            times = np.concatenate(([self.last_time], times_ns))
+            values = np.concatenate(([self.last_equity], equity))
+            held = np.concatenate(([self.last_exposed], exposed[:-1]))
+        else:
+            self.first_time = int(times_ns[0])
+            times, values, held = times_ns, equity, exposed[:-1]
+        self.exposed_ns += int(np.sum(np.diff(times)[held]))
+
+        # Returns up to and including the step into ruin, none after it
+        ruin = np.flatnonzero(values <= 0)
+        end = 0 if self.ruined else (int(ruin[0]) if len(ruin) else len(values) - 1)
+        r = values[1:end + 1] / values[:end] - 1
+        self.ruined = self.ruined or len(ruin) > 0
+        if len(r):
+            n = self.returns + len(r)
+            mean = r.mean()
+            delta = mean - self.mean
+            self.m2 += float(np.sum((r - mean) ** 2)) + delta * delta * self.returns * len(r) / n
+            self.mean += delta * len(r) / n
+            self.returns = n
+            self.downside += float(np.sum(np.minimum(r, 0) ** 2))
+
+        peaks = np.maximum.accumulate(np.concatenate(([self.peak], equity)))[1:]
+        positive = peaks > 0
+        if positive.any():
+            drawdown = float(np.max((peaks[positive] - equity[positive]) / peaks[positive]))
+            self.max_drawdown = min(max(self.max_drawdown, drawdown), 1.0)
+        self.peak = float(peaks[-1])
+        self.marks += len(equity)
+        self.last_time = int(times_ns[-1])
+        self.last_equity = float(equity[-1])
+        self.last_exposed = bool(exposed[-1])
+
+    def _annualized(self, ratio):
+        years = (self.last_time - self.first_time) / 1e9 / SECONDS_PER_YEAR
+        return ratio * math.sqrt(self.returns / years) if years > 0 else ratio
+
+    def summary(self):
+        losses = self.trades - self.wins
+        std = math.sqrt(self.m2 / (self.returns - 1)) if self.returns > 1 else 0.0
+        downside_deviation = math.sqrt(self.downside / self.returns) if self.returns else 0.0
+        duration = self.last_time - self.first_time
+        return {
+            "trades": self.trades,
+            "wins": self.wins,
+            "losses": losses,
+            "win_rate": self.wins / self.trades if self.trades else 0.0,
+            "total_profit": self.gross_profit - self.gross_loss,
+            "gross_profit": self.gross_profit,
+            "gross_loss": self.gross_loss,
+            "profit_factor": self.gross_profit / self.gross_loss if self.gross_loss else (math.inf if self.wins else 0.0),
+            "average_win": self.gross_profit / self.wins if self.wins else 0.0,
+            "average_loss": -self.gross_loss / losses if losses else 0.0,
+            "largest_win": self.largest_win,
+            "largest_loss": self.largest_loss,
+            "max_drawdown": self.max_drawdown,
+            "sharpe": RUIN_RATIO if self.ruined else (self._annualized(self.mean / std) if std > 0 else 0.0),
+            "sortino": RUIN_RATIO if self.ruined else (self._annualized(self.mean / downside_deviation)
+                                                       if downside_deviation > 0 else 0.0),
+            "exposure": self.exposed_ns / duration if duration > 0 else 0.0,
+            "ruined": self.ruined,
+        }
+
+    def state(self):
+        """Every running total by name, as saved in checkpoints."""
+        return {name: getattr(self, name) for name in self.TRADE_FIELDS + self.EQUITY_FIELDS}
+
+    def load(self, state):
+        for name in self.TRADE_FIELDS + self.EQUITY_FIELDS:
+            if name in state:  # checkpoints may predate a field; it keeps its reset value
+                setattr(self, name, type(getattr(self, name))(state[name]))
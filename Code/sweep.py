@@ -0,0 +1,111 @@
+import argparse
+import itertools
+import logging
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import pandas as pd
+
+from DEFINEs import *
+from data_manager import DataManager
+from backtest import rsi_signals, run_backtest
+
+PARAMETERS = ('risk_percentage', 'leverage', 'spread', 'stop_loss_pips', 'rsi_threshold_low', 'rsi_threshold_high')
+
+_worker_data_manager = None
+
+
+def _init_worker(csv_file):
+    # Every worker memory-maps the same on-disk cache, so the bars are shared
+    # read-only through the page cache instead of being pickled per task.
+    global _worker_data_manager
+    logging.getLogger().setLevel(logging.WARNING)
+    _worker_data_manager = DataManager(csv_file)
+
+
+def _run_one(params):
+    data_manager = _worker_data_manager
+    signals = rsi_signals(data_manager, params['rsi_threshold_low'], params['rsi_threshold_high'])
+    result = run_backtest(data_manager, signals=signals, stop_loss_pips=params['stop_loss_pips'],
+                          risk_percentage=params['risk_percentage'], spread=params['spread'],
+                          leverage=params['leverage'])
+    return dict(params, **result.metrics)
+
+
+def grid(**values):
+    """Every combination of the given parameter lists."""
+    names = list(values)
+    for combination in itertools.product(*(values[name] for name in names)):
+        yield dict(zip(names, combination))
+
+
+def random_sample(count, seed=None, **values):
+    """`count` random combinations; each value is a list to choose from or a (low, high) float range."""
+    rng = random.Random(seed)
+    for _ in range(count):
+        params = {}
+        for name, choices in values.items():
+            if isinstance(choices, tuple):
+                params[name] = rng.uniform(*choices)
+            else:
+                params[name] = rng.choice(choices)
+        yield params
+
+
+def run_sweep(csv_file, param_sets, metric='final_balance', workers=None, on_result=None):
+    """Run one backtest per parameter set across a process pool and return the results ranked by `metric`."""
+    DataManager(csv_file)  # make sure the shared binary cache exists before the workers start
+    rows = []
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count(), initializer=_init_worker,
+                             initargs=(csv_file,)) as executor:
+        futures = [executor.submit(_run_one, params) for params in param_sets]
+        for future in as_completed(futures):
+            row = future.result()
+            rows.append(row)
+            if on_result is not None:
+                on_result(row)
+    table = pd.DataFrame(rows)
+    if not table.empty:
+        table.sort_values(metric, ascending=(metric == 'max_drawdown'), inplace=True, ignore_index=True)
+    return table
+
+
+def _float_list(text):
+    return [float(value) for value in text.split(',')]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Parallel parameter sweep of the RSI strategy")
+    parser.add_argument("--csv", default=DATASET_FILE_PATH)
+    parser.add_argument("--risk", type=_float_list, default=[RISK_PERCENTAGE])
+    parser.add_argument("--leverage", type=_float_list, default=[LEVERAGE])
+    parser.add_argument("--spread", type=_float_list, default=[SPREAD])
+    parser.add_argument("--stop-loss", type=_float_list, default=[10, 20, 30])
+    parser.add_argument("--rsi-low", type=_float_list, default=[20, 25, 30, 35])
+    parser.add_argument("--rsi-high", type=_float_list, default=[65, 70, 75, 80])
+    parser.add_argument("--samples", type=int, default=0, help="random combinations to draw instead of the full grid")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--metric", default="final_balance",
+                        choices=["final_balance", "total_profit", "win_rate", "max_drawdown", "trades", "profit_factor", "sharpe", "sortino", "exposure"])
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--top", type=int, default=20)
+    args = parser.parse_args()
+
+    values = dict(risk_percentage=args.risk, leverage=args.leverage, spread=args.spread,
+                  stop_loss_pips=args.stop_loss, rsi_threshold_low=args.rsi_low, rsi_threshold_high=args.rsi_high)
+    param_sets = list(random_sample(args.samples, args.seed, **values) if args.samples else grid(**values))
+    print(f"Running {len(param_sets)} backtests...")
+
+    def on_result(row):
+        print(", ".join(f"{name}={row[name]:g}" for name in PARAMETERS) + f" -> {args.metric}={row[args.metric]:.4f}")
+
+    start = time.perf_counter()
+    table = run_sweep(args.csv, param_sets, args.metric, args.workers, on_result)
+    print(f"\nFinished in {time.perf_counter() - start:.2f} s. Top {args.top} by {args.metric}:")
+    print(table.head(args.top).to_string())
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,61 @@
+import threading
+from collections import deque
+
+
+class TickStream:
+    """Publishes every tick the simulator processes as a numbered tick for push clients.
+
+    A tick is published by Simulator.update_trades() once per new cursor position, after that
+    tick's stop-outs, so `balance` is the balance at that tick. Replay steps one sub-tick at a time
+    and so publishes every price; a jump (seek, go-to-date) is processed, and published, as one
+    tick at the new position (`index`/`sub_index` show the gap).
+    Ticks carry a sequence number that increases by one per published tick, so a client
+    that sees a jump knows it missed ticks. The last `history` ticks are kept so a
+    reconnecting client can resume from the last sequence number it received.
+    """
+
+    def __init__(self, simulator, history=4096):
+        self.simulator = simulator
+        self.sequence = 0
+        self.history = deque(maxlen=history)
+        self.condition = threading.Condition()
+        simulator.add_tick_listener(self.publish)
+
+    def close(self):
+        self.simulator.remove_tick_listener(self.publish)
+
+    def publish(self, simulator):
+        data_manager = simulator.data_manager
+        price = data_manager.get_current_price()
+        if price is None:
+            return
+        tick = {
+            "timestamp": data_manager.get_current_time().isoformat(),
+            "index": data_manager.current_index,
+            "sub_index": data_manager.sub_index,
+            "price": float(price),
+            "rsi": float(data_manager.get_value('rsi14', 50)),
+            "balance": float(simulator.account_balance),
+        }
+        with self.condition:
+            self.sequence += 1
+            tick["seq"] = self.sequence
+            self.history.append(tick)
+            self.condition.notify_all()
+
+    def since(self, sequence):
+        """Buffered ticks newer than `sequence` (oldest first)."""
+        with self.condition:
+            return self._since(sequence)
+
+    def _since(self, sequence):
+        if sequence >= self.sequence:
+            return []
+        count = min(self.sequence - sequence, len(self.history))
+        return list(self.history)[-count:]
+
+    def wait(self, sequence, timeout=None):
+        """Block until there are ticks newer than `sequence` (or timeout) and return them."""
+        with self.condition:
+            self.condition.wait_for(lambda: self.sequence > sequence, timeout)
+            return self._since(sequence)
@@ -1,8 +1,15 @@
 import matplotlib.dates as mdates
-from PyQt5 import QtWidgets
+import numpy as np
+from PyQt5 import QtCore, QtWidgets
 from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
+from matplotlib.backends.backend_qt5agg import NavigationToolbar2QT as NavigationToolbar
 from matplotlib.figure import Figure
 
+from chart_renderer import CandleArtists, ohlc_pyramid
+from trade_models import ClosedTradesModel
+
+PIXELS_PER_CANDLE = 3  # narrower candles switch to the next coarser level of the pyramid
+
 class MplCanvas(FigureCanvas):
     def __init__(self, parent=None, width=8, height=5, dpi=100):
         self.fig = Figure(figsize=(width, height), dpi=dpi)
@@ -10,6 +17,13 @@ class MplCanvas(FigureCanvas):
         super(MplCanvas, self).__init__(self.fig)
 
 class TradeHistoryChart(QtWidgets.QMainWindow):
+    """Whole-dataset chart with the closed trades.
+
+    Candles come from an OHLC pyramid: only the candles in view are drawn, at the finest resolution
+    (bars, 4h, daily, weekly) that leaves at least PIXELS_PER_CANDLE pixels per candle, and the level
+    is picked again whenever the view is zoomed, panned or resized.
+    """
+
     def __init__(self, data_manager, simulator):
         super().__init__()
         self.data_manager = data_manager
@@ -17,54 +31,77 @@ class TradeHistoryChart(QtWidgets.QMainWindow):
         self.setWindowTitle("Trade History Chart")
         self.canvas = MplCanvas(self, width=8, height=5, dpi=100)
         self.setCentralWidget(self.canvas)
+        self.addToolBar(NavigationToolbar(self.canvas, self))
+        self.pyramid = ohlc_pyramid(data_manager.store)
+        self.shown = None  # (level name, first, last) of the candles currently drawn
+
+        axes = self.canvas.axes
+        self.candles = CandleArtists(axes)
+        self.entries = axes.scatter([], [], marker='o', color='blue', s=64, label='Entry', zorder=3)
+        self.exits = axes.scatter([], [], marker='x', color='red', s=64, label='Exit', zorder=3)
+        axes.xaxis_date()
+        axes.callbacks.connect('xlim_changed', self.update_candles)
+        self.canvas.mpl_connect('resize_event', self.update_candles)
         self.update_chart()
 
+    def update_candles(self, *args):
+        axes = self.canvas.axes
+        first, last = axes.get_xlim()
+        max_candles = max(int(axes.bbox.width / PIXELS_PER_CANDLE), 1)
+        level, visible = self.pyramid.pick(first, last, max_candles)
+        if self.shown == (level['name'], visible.start, visible.stop):
+            return
+        self.shown = (level['name'], visible.start, visible.stop)
+        self.candles.set_data(level['x'][visible], level['open'][visible], level['high'][visible],
+                              level['low'][visible], level['close'][visible], level['width'])
+        self.canvas.draw_idle()
+
     def update_chart(self):
-        data_window = self.data_manager.get_data_window(window_size=len(self.data_manager.data))
-        if data_window.empty:
+        store = self.data_manager.store
+        if len(store) == 0:
             return
-        self.canvas.axes.clear()
-        dates = mdates.date2num(data_window['date_time'])
-        ohlc_data = list(zip(dates, data_window['Open'], data_window['High'], 
-                             data_window['Low'], data_window['Close']))
-        from mpl_finance import candlestick_ohlc
-        candlestick_ohlc(self.canvas.axes, ohlc_data, width=0.6/(24*60), colorup='g', colordown='r')
-        
+        axes = self.canvas.axes
         closed_trades = self.simulator.get_closed_trades()
-        for trade in closed_trades:
-            entry_time = mdates.date2num(trade.open_time)
-            self.canvas.axes.plot(entry_time, trade.entry_price, marker='o', color='blue', markersize=8, label='Entry' if 'Entry' not in self.canvas.axes.get_legend_handles_labels()[1] else "")
-            if trade.close_time:
-                exit_time = mdates.date2num(trade.close_time)
-                self.canvas.axes.plot(exit_time, trade.exit_price, marker='x', color='red', markersize=8, label='Exit' if 'Exit' not in self.canvas.axes.get_legend_handles_labels()[1] else "")
-        
-        self.canvas.axes.set_xlim(dates[0] - 0.5, dates[-1] + 0.5)
-        self.canvas.axes.xaxis_date()
-        self.canvas.axes.legend()
+        times = np.array([[t.open_time, t.close_time] for t in closed_trades], dtype='datetime64[ns]').reshape(-1, 2)
+        prices = np.array([[t.entry_price, t.exit_price] for t in closed_trades], dtype=np.float64).reshape(-1, 2)
+        x = mdates.date2num(times.ravel()).reshape(-1, 2)
+        self.entries.set_offsets(np.column_stack((x[:, 0], prices[:, 0])))
+        self.exits.set_offsets(np.column_stack((x[:, 1], prices[:, 1])))
+
+        dates = self.pyramid.levels[0]['x']
+        low, high = np.nanmin(store.low), np.nanmax(store.high)
+        pad = (high - low) * 0.05 or 1e-4
+        axes.set_ylim(low - pad, high + pad)
+        axes.set_xlim(dates[0] - 0.5, dates[-1] + 0.5)
+        axes.legend(loc='upper left')
         self.canvas.fig.tight_layout()
+        self.update_candles()
         self.canvas.draw()
 
 class TradeHistoryList(QtWidgets.QMainWindow):
-    def __init__(self, simulator):
+    """Closed trades in a model-backed table that grows as trades close; sortable and filterable."""
+
+    def __init__(self, simulator, refresh_ms=1000):
         super().__init__()
         self.simulator = simulator
         self.setWindowTitle("Trade History List")
-        self.table = QtWidgets.QTableWidget()
-        self.setCentralWidget(self.table)
-        self.table.setColumnCount(7)
-        self.table.setHorizontalHeaderLabels(["Trade ID", "Type", "Entry Price", "Exit Price", "Profit", "Open Time", "Close Time"])
+        self.model = ClosedTradesModel(self)
+        self.filter_input = QtWidgets.QLineEdit()
+        self.filter_input.setPlaceholderText("Filter (e.g. buy, sell, a date)")
+        self.filter_input.textChanged.connect(self.model.set_filter)
+        self.table = QtWidgets.QTableView()
+        self.table.setModel(self.model)
+        self.table.setSortingEnabled(True)
+        self.table.sortByColumn(0, QtCore.Qt.AscendingOrder)
+        central_widget = QtWidgets.QWidget()
+        layout = QtWidgets.QVBoxLayout(central_widget)
+        layout.addWidget(self.filter_input)
+        layout.addWidget(self.table)
+        self.setCentralWidget(central_widget)
         self.update_list()
+        self.timer = QtCore.QTimer(self)
+        self.timer.timeout.connect(self.update_list)
+        self.timer.start(refresh_ms)
 
     def update_list(self):
-        closed_trades = self.simulator.get_closed_trades()
-        self.table.setRowCount(len(closed_trades))
-        for row, trade in enumerate(closed_trades):
-            self.table.setItem(row, 0, QtWidgets.QTableWidgetItem(str(trade.trade_id)))
-            self.table.setItem(row, 1, QtWidgets.QTableWidgetItem(trade.trade_type))
-            self.table.setItem(row, 2, QtWidgets.QTableWidgetItem(f"{trade.entry_price:.5f}"))
-            exit_price = f"{trade.exit_price:.5f}" if trade.exit_price is not None else ""
-            self.table.setItem(row, 3, QtWidgets.QTableWidgetItem(exit_price))
-            profit = trade.get_profit(trade.exit_price) if trade.exit_price is not None else 0
-            self.table.setItem(row, 4, QtWidgets.QTableWidgetItem(f"{profit:.2f}"))
-            self.table.setItem(row, 5, QtWidgets.QTableWidgetItem(str(trade.open_time)))
-            self.table.setItem(row, 6, QtWidgets.QTableWidgetItem(str(trade.close_time) if trade.close_time else ""))
\ No newline at end of file
+        self.model.refresh(self.simulator)
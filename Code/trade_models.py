@@ -0,0 +1,197 @@
+import numpy as np
+from PyQt5 import QtCore
+
+
+class TradeTableModel(QtCore.QAbstractTableModel):
+    """Read-only table of trades; views only ask for the cells they show.
+
+    Sorting (sort(), called when a header is clicked) and filtering (set_filter()) happen in the
+    model: they only recompute `rows`, the source rows in display order, with one NumPy argsort, so
+    no widgets are rebuilt and Qt never calls back into Python once per comparison. Subclasses
+    provide size(), value(row, column) and text(row, column) for source rows.
+    """
+
+    def __init__(self, headers, parent=None):
+        super().__init__(parent)
+        self.headers = headers
+        self.rows = np.zeros(0, dtype=np.intp)
+        self.sort_column = None
+        self.sort_order = QtCore.Qt.AscendingOrder
+        self.filter_text = ""
+
+    def size(self):
+        raise NotImplementedError
+
+    def value(self, row, column):
+        raise NotImplementedError
+
+    def text(self, row, column):
+        return str(self.value(row, column))
+
+    def sort_key(self, column):
+        return np.array([self.value(row, column) for row in range(self.size())])
+
+    def matches(self, needle):
+        """Mask of the source rows with `needle` (lower case) in any of their cells."""
+        return np.array([any(needle in self.text(row, column).lower() for column in range(len(self.headers)))
+                         for row in range(self.size())], dtype=bool)
+
+    def rowCount(self, parent=QtCore.QModelIndex()):
+        return 0 if parent.isValid() else len(self.rows)
+
+    def columnCount(self, parent=QtCore.QModelIndex()):
+        return 0 if parent.isValid() else len(self.headers)
+
+    def headerData(self, section, orientation, role=QtCore.Qt.DisplayRole):
+        if role == QtCore.Qt.DisplayRole and orientation == QtCore.Qt.Horizontal:
+            return self.headers[section]
+        return super().headerData(section, orientation, role)
+
+    def data(self, index, role=QtCore.Qt.DisplayRole):
+        if role != QtCore.Qt.DisplayRole or not index.isValid():
+            return None
+        return self.text(self.rows[index.row()], index.column())
+
+    def _visible_rows(self):
+        rows = np.arange(self.size())
+        if self.filter_text:
+            rows = rows[self.matches(self.filter_text)]
+        if self.sort_column is not None and len(rows):
+            rows = rows[np.argsort(self.sort_key(self.sort_column)[rows], kind='stable')]
+            if self.sort_order == QtCore.Qt.DescendingOrder:
+                rows = rows[::-1]
+        return rows
+
+    def _reorder(self):
+        # A layout change keeps the view's selection and current cell on the same trades
+        self.layoutAboutToBeChanged.emit()
+        persistent = self.persistentIndexList()
+        sources = [self.rows[index.row()] for index in persistent]
+        self.rows = self._visible_rows()
+        position = np.full(self.size(), -1, dtype=np.intp)
+        position[self.rows] = np.arange(len(self.rows))
+        self.changePersistentIndexList(persistent, [
+            self.index(int(position[source]), index.column()) if position[source] >= 0 else QtCore.QModelIndex()
+            for index, source in zip(persistent, sources)])
+        self.layoutChanged.emit()
+
+    def _rows_added(self, first):
+        """Show the source rows from `first` on: appended to the view, then sorted into place if needed."""
+        added = np.arange(first, self.size())
+        if self.filter_text:
+            added = added[self.matches(self.filter_text)[first:]]
+        if len(added):
+            self.beginInsertRows(QtCore.QModelIndex(), len(self.rows), len(self.rows) + len(added) - 1)
+            self.rows = np.concatenate((self.rows, added))
+            self.endInsertRows()
+            if self.sort_column is not None:
+                self._reorder()
+
+    def _reset(self):
+        self.beginResetModel()
+        self.rows = self._visible_rows()
+        self.endResetModel()
+
+    def sort(self, column, order=QtCore.Qt.AscendingOrder):
+        self.sort_column, self.sort_order = column, order
+        self._reorder()
+
+    def set_filter(self, text):
+        self.filter_text = text.strip().lower()
+        self._reset()
+
+
+class OpenTradesModel(TradeTableModel):
+    """Open trades and their unrealized P&L, in the simulator's position order.
+
+    A tick that opens or closes nothing only replaces the P&L array and reports the P&L column as
+    changed (re-sorting if the table is sorted by P&L); new trades are inserted as rows, and anything
+    else (a close moves the last position into the freed slot) resets the model.
+    """
+    PNL_COLUMN = 4
+
+    def __init__(self, parent=None):
+        super().__init__(["Trade ID", "Type", "Entry Price", "Size", "P&L", "Leverage", "Status"], parent)
+        self.trades = []
+        self.pnl = np.zeros(0)
+
+    def size(self):
+        return len(self.trades)
+
+    def value(self, row, column):
+        trade = self.trades[row]
+        return (trade.trade_id, trade.trade_type, trade.entry_price, trade.size, float(self.pnl[row]), trade.leverage,
+                "Open (AI)" if trade.is_ai_trade else "Open")[column]
+
+    def text(self, row, column):
+        value = self.value(row, column)
+        if column == 2:
+            return f"{value:.5f}"
+        if column in (3, self.PNL_COLUMN):
+            return f"{value:.2f}"
+        return str(value)
+
+    def sort_key(self, column):
+        if column == self.PNL_COLUMN:
+            return self.pnl
+        return super().sort_key(column)
+
+    def update(self, trades, pnl):
+        """Take the simulator's open trades and P&L (get_unrealized_pnl) for this tick."""
+        old = len(self.trades)
+        if trades == self.trades:
+            self.pnl = pnl
+            if self.sort_column == self.PNL_COLUMN:
+                self._reorder()
+            if len(self.rows):
+                self.dataChanged.emit(self.index(0, self.PNL_COLUMN), self.index(len(self.rows) - 1, self.PNL_COLUMN),
+                                      [QtCore.Qt.DisplayRole])
+        elif len(trades) > old and trades[:old] == self.trades:
+            self.trades, self.pnl = trades, pnl
+            self._rows_added(old)
+        else:
+            self.trades, self.pnl = trades, pnl
+            self._reset()
+
+
+class ClosedTradesModel(TradeTableModel):
+    """Closed trades, appended as they close; each trade's cells are formatted once."""
+
+    def __init__(self, parent=None):
+        super().__init__(["Trade ID", "Type", "Entry Price", "Exit Price", "Profit", "Open Time", "Close Time"], parent)
+        self.values = []  # per trade: the raw value of every column
+        self.texts = []  # per trade: the displayed text of every column
+        self.search = []  # per trade: all its texts in lower case, for the filter
+
+    def size(self):
+        return len(self.values)
+
+    def value(self, row, column):
+        return self.values[row][column]
+
+    def text(self, row, column):
+        return self.texts[row][column]
+
+    def matches(self, needle):
+        return np.array([needle in text for text in self.search], dtype=bool)
+
+    def append(self, trades):
+        if not trades:
+            return
+        first = self.size()
+        for trade in trades:
+            profit = trade.get_profit(trade.exit_price) if trade.exit_price is not None else 0
+            values = (trade.trade_id, trade.trade_type, trade.entry_price,
+                      np.nan if trade.exit_price is None else trade.exit_price, profit,
+                      str(trade.open_time), str(trade.close_time or ""))
+            texts = (str(trade.trade_id), trade.trade_type, f"{trade.entry_price:.5f}",
+                     "" if trade.exit_price is None else f"{trade.exit_price:.5f}", f"{profit:.2f}",
+                     values[5], values[6])
+            self.values.append(values)
+            self.texts.append(texts)
+            self.search.append("\t".join(texts).lower())
+        self._rows_added(first)
+
+    def refresh(self, simulator):
+        """Append the trades the simulator closed since the last call."""
+        self.append(simulator.get_closed_trades(since=self.size()))
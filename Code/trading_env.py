@@ -0,0 +1,129 @@
+import threading
+
+import numpy as np
+
+from DEFINEs import *
+from data_manager import SUB_TICKS, require_single_symbol
+from features import feature_set
+from simulator import Simulator
+
+ACTIONS = ("buy", "sell", "hold")  # same order as ai_trader.Action
+
+
+def _is_int(value):
+    return isinstance(value, (int, np.integer)) and not isinstance(value, bool)
+
+
+class TradingEnv:
+    """Gym-style lockstep environment: time only advances when the agent calls step().
+
+    The environment owns a forked DataManager cursor and its own Simulator, so it is not
+    moved by the dashboard's timer and an episode is fully determined by its seed.
+    Actions follow ai_trader.SimpleTrader: BUY/SELL open a position when flat, HOLD closes it.
+    The reward is the change in equity (balance plus unrealized P&L) over the step.
+    With a feature spec (see features.DEFAULT_FEATURES) observations also carry the bar's
+    precomputed discrete "state" and normalized "features" vector.
+    """
+
+    def __init__(self, data_manager, episode_length=None, stop_loss_pips=20, ticks_per_step=SUB_TICKS,
+                 initial_balance=INITIAL_BALANCE, risk_percentage=RISK_PERCENTAGE, spread=SPREAD,
+                 commission_per_lot=COMMISSION_PER_LOT, leverage=LEVERAGE, features=None):
+        require_single_symbol(data_manager, "TradingEnv")
+        if episode_length is not None and (not _is_int(episode_length) or episode_length < 1):
+            raise ValueError(f"episode_length must be a positive integer, got {episode_length!r}")
+        if isinstance(stop_loss_pips, bool) or not isinstance(stop_loss_pips, (int, float)) or stop_loss_pips <= 0:
+            raise ValueError(f"stop_loss_pips must be a positive number, got {stop_loss_pips!r}")
+        self.data_manager = data_manager.fork()
+        self.features = feature_set(data_manager, features) if features is not None else None
+        self.episode_length = episode_length
+        self.stop_loss_pips = stop_loss_pips
+        self.ticks_per_step = ticks_per_step
+        self.settings = (initial_balance, risk_percentage, spread, commission_per_lot, leverage)
+        self.simulator = None
+        self.trade_id = None
+        self.end_position = 0
+        self.steps = 0
+        self.done = False
+        self.lock = threading.Lock()  # one request at a time per environment
+
+    def reset(self, seed=None, start_index=None):
+        with self.lock:
+            return self._reset(seed, start_index)
+
+    def _reset(self, seed, start_index):
+        data_manager = self.data_manager
+        rng = np.random.default_rng(seed)
+        bars = len(data_manager)
+        length = min(self.episode_length or bars, bars)
+        if start_index is None:
+            start_index = int(rng.integers(0, bars - length + 1)) if self.episode_length else 0
+        elif not _is_int(start_index) or not 0 <= start_index <= bars - length:
+            raise ValueError(f"start_index must be an integer in [0, {bars - length}], got {start_index!r}")
+        data_manager.seek(start_index * SUB_TICKS)
+        self.end_position = min(start_index + length, bars) * SUB_TICKS - 1
+        self.simulator = Simulator(data_manager, *self.settings)
+        self.trade_id = None
+        self.steps = 0
+        self.done = False
+        return self.observation()
+
+    def equity(self):
+        _, pnl = self.simulator.get_unrealized_pnl()
+        return float(self.simulator.account_balance + pnl.sum())
+
+    def observation(self):
+        data_manager = self.data_manager
+        trade = self.simulator.book.get_open(self.trade_id) if self.trade_id is not None else None
+        observation = {
+            "timestamp": data_manager.get_current_time().isoformat(),
+            "index": data_manager.current_index,
+            "sub_index": data_manager.sub_index,
+            "price": float(data_manager.get_current_price()),
+            "rsi": float(data_manager.get_value('rsi14', 50)),
+            "balance": float(self.simulator.account_balance),
+            "equity": self.equity(),
+            "position": 0 if trade is None else (1 if trade.trade_type == "buy" else -1),
+        }
+        if self.features is not None:
+            index = min(data_manager.current_index, len(self.features) - 1)
+            observation["state"] = self.features.state(index)
+            observation["features"] = self.features.vector(index).tolist()
+        return observation
+
+    def step(self, action):
+        """Apply action (0/1/2 or 'buy'/'sell'/'hold'), advance one step; returns (observation, reward, done, info)."""
+        if self.simulator is None:
+            raise RuntimeError("Call reset() before step()")
+        with self.lock:
+            if self.done:
+                raise RuntimeError("The episode is over; call reset() to start a new one")
+            return self._step(action)
+
+    def _step(self, action):
+        if isinstance(action, str):
+            action = ACTIONS.index(action.lower())
+        simulator = self.simulator
+        before = self.equity()
+        if self.trade_id is not None and simulator.book.get_open(self.trade_id) is None:
+            self.trade_id = None  # stopped out
+        profit = None
+        if ACTIONS[action] == "hold":
+            if self.trade_id is not None:
+                profit = simulator.close_trade(self.trade_id)
+                self.trade_id = None
+        elif self.trade_id is None:
+            self.trade_id = simulator.open_trade(ACTIONS[action], self.stop_loss_pips, is_ai_trade=True)
+
+        data_manager = self.data_manager
+        for _ in range(self.ticks_per_step):
+            if data_manager.position >= self.end_position:
+                break
+            data_manager.step_forward()
+            simulator.update_trades()
+        self.steps += 1
+
+        done = bool(data_manager.position >= self.end_position or simulator.account_balance <= 0)
+        self.done = done
+        reward = self.equity() - before
+        info = {"steps": self.steps, "realized_profit": profit, "trade_id": self.trade_id}
+        return self.observation(), reward, done, info